@@ -0,0 +1,3 @@
+"""
+Benchmarks and differential tests for the poker package
+"""
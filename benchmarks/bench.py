@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmarks
+
+    python -m benchmarks.bench --save benchmarks/baseline.json
+    python -m benchmarks.bench --compare benchmarks/baseline.json
+
+Times the hand-ranking functions, single-deal and batched simulation, game()
+and the three analysis tables at a few sizes, and prints each workload's
+throughput (hands/s or sims/s). Each workload runs `--repeat` times and the
+best run counts. --save writes the results as a JSON baseline; --compare
+flags every workload more than --threshold slower than the baseline and exits
+with status 1 if there is one.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from poker.dealing import Dealer
+from poker.evaluator import encode
+from poker.simulation import game, holdem_simulation
+from poker.showdown import break_tie, check_hand, game_result
+from benchmarks.oracle import random_hands
+
+HERO = [(14, 'Spade'), (13, 'Heart')]
+
+def _hands_workload(function, n):
+    hands = random_hands(n, seed=1)
+    def run():
+        for hand in hands:
+            function(hand)
+        return n
+    return run
+
+def _pairs_workload(function, n):
+    hands = random_hands(2 * n, seed=1)
+    pairs = list(zip(hands[::2], hands[1::2]))
+    def run():
+        for first, second in pairs:
+            function(first, second)
+        return n
+    return run
+
+# game_result on n deals of 3 opponents; counts hands evaluated
+def _game_result_workload(n):
+    deals = [hand + other for hand, other in zip(random_hands(n, seed=1), random_hands(n, seed=2))]
+    deals = [[card for card in dict.fromkeys(deal)][:11] for deal in deals]
+    deals = [deal for deal in deals if len(deal) == 11]
+    def run():
+        for deal in deals:
+            game_result(deal[:2], [deal[2:4], deal[4:6]], deal[6:11])
+        return 3 * len(deals)
+    return run
+
+def _holdem_simulation_workload(n, opponents):
+    def run():
+        dealer = Dealer(encode(HERO), rng=np.random.default_rng(0))
+        for i in range(n):
+            holdem_simulation(HERO, opponents, 0, dealer)
+        return n
+    return run
+
+def _game_workload(sims, opponents, batch_size):
+    def run():
+        np.random.seed(0)
+        game(HERO, opponents, sims, 0, batch_size, exact_threshold=0)
+        return sims
+    return run
+
+def _pocket_hands_workload(sims, max_opponents):
+    def run():
+        from poker.reports import pocket_hands_table
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            pocket_hands_table(sims, workers=1, checkpoint_dir=checkpoint_dir, max_opponents=max_opponents)
+        return 169 * sims
+    return run
+
+def _what_wins_workload(sims, batch_size):
+    def run():
+        from poker.reports import what_wins_table
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            what_wins_table(sims, checkpoint_dir=checkpoint_dir, batch_size=batch_size)
+        return 8 * sims
+    return run
+
+def _pocket_frequency_workload(sims, batch_size):
+    def run():
+        from poker.reports import pocket_frequency_table
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            pocket_frequency_table(sims, checkpoint_dir=checkpoint_dir, batch_size=batch_size)
+        return 8 * sims
+    return run
+
+# (name, unit, run) for every workload; run() returns how many units it did
+def workloads(scale=1):
+    for n in (1000, 10000):
+        yield 'check_hand %d' % n, 'hands', _hands_workload(check_hand, n * scale)
+        yield 'break_tie %d' % n, 'hands', _pairs_workload(break_tie, n * scale)
+        yield 'game_result %d' % n, 'hands', _game_result_workload(n * scale)
+    for opponents in (1, 8):
+        yield 'holdem_simulation %d opp' % opponents, 'sims', _holdem_simulation_workload(5000 * scale, opponents)
+        yield 'game %d opp single' % opponents, 'sims', _game_workload(5000 * scale, opponents, None)
+        for sims in (10000, 100000):
+            yield 'game %d opp batch %d' % (opponents, sims), 'sims', _game_workload(sims * scale, opponents, 10000)
+    yield 'pocket_hands_table 200x4', 'sims', _pocket_hands_workload(200 * scale, 4)
+    for sims in (1000, 10000):
+        yield 'what_wins_table %d' % sims, 'sims', _what_wins_workload(sims * scale, 10000)
+        yield 'pocket_frequency_table %d' % sims, 'sims', _pocket_frequency_workload(sims * scale, 10000)
+    yield 'what_wins_table 1000 single', 'sims', _what_wins_workload(1000 * scale, 0)
+    yield 'pocket_frequency_table 1000 single', 'sims', _pocket_frequency_workload(1000 * scale, 0)
+
+def run_benchmarks(repeat=3, scale=1, select=None):
+    results = {}
+    for name, unit, run in workloads(scale):
+        if select and select not in name:
+            continue
+        best = None
+        for i in range(repeat):
+            start = time.perf_counter()
+            count = run()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        results[name] = {'unit': unit, 'count': count, 'seconds': best, 'rate': count / best}
+        print('%-40s %10.4f s %14.0f %s/s' % (name, best, count / best, unit))
+    return results
+
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+            'commit': commit}
+
+# Workloads slower than the baseline by more than `threshold`, as
+# (name, baseline rate, rate)
+def regressions(results, baseline, threshold=0.2):
+    slower = []
+    for name, result in results.items():
+        if name in baseline and result['rate'] < baseline[name]['rate'] * (1 - threshold):
+            slower.append((name, baseline[name]['rate'], result['rate']))
+    return slower
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scale', type=int, default=1, help='multiply every workload size by this')
+    parser.add_argument('--select', default=None, help='only run workloads whose name contains this')
+    parser.add_argument('--save', default=None, help='write results to this JSON file')
+    parser.add_argument('--compare', default=None, help='JSON baseline to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown, as a fraction')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat, args.scale, args.select)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'environment': _environment(), 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        slower = regressions(results, baseline, args.threshold)
+        for name, baseline_rate, rate in slower:
+            print('REGRESSION %s: %.0f -> %.0f per second (%.0f%%)' % (name, baseline_rate, rate,
+                                                                     (rate / baseline_rate - 1) * 100))
+        if slower:
+            return 1
+        print('No regressions over %.0f%% against %s' % (args.threshold * 100, args.compare))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
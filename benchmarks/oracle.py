@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Differential tests against the reference rankings
+
+    python -m benchmarks.oracle --hands 100000 --batch-hands 1000000
+
+Every faster path is checked against poker.reference, the original check_*
+functions: poker.reference.reference_rank ranks a hand as its best five-card
+subset using only those functions. Hands are random 7-card hands plus
+adversarial ones (wheels, two trips, three pairs, six- and seven-card flushes,
+straight flushes under bigger off-suit straights, ...). The table evaluator,
+its board-first evaluate_hole and the showdown wrappers are checked against
+the reference; the NumPy batch evaluator, including counts added onto a
+shared board, is checked against the table evaluator on many more hands; the
+dealers are checked for uniform deals. Exits with status 1 on any mismatch.
+"""
+
+import argparse
+import itertools
+import random
+import sys
+
+import numpy as np
+
+from poker.batch import card_counts, evaluate_batch
+from poker.dealing import Dealer, deal_batch
+from poker.evaluator import SUITS, board_state, encode, evaluate, evaluate_hole, hand_category
+from poker.pockets import POCKET_INDEX
+from poker.reference import reference_rank
+from poker.showdown import break_tie, check_hand, game_result
+
+DECK = list(itertools.product(range(2, 15), SUITS))
+
+def _fill(rng, cards, size=7):
+    rest = [card for card in DECK if card not in cards]
+    return cards + rng.sample(rest, size - len(cards))
+
+def _distinct_values(rng, count, exclude=()):
+    return rng.sample([v for v in range(2, 15) if v not in exclude], count)
+
+# Adversarial 7-card hands, one generator per shape
+def _wheel(rng):
+    return _fill(rng, [(v, rng.choice(SUITS)) for v in (14, 2, 3, 4, 5)])
+
+def _wheel_straight_flush(rng):
+    suit = rng.choice(SUITS)
+    return _fill(rng, [(v, suit) for v in (14, 2, 3, 4, 5)])
+
+def _two_trips(rng):
+    cards = []
+    for v in _distinct_values(rng, 2):
+        cards += [(v, suit) for suit in rng.sample(SUITS, 3)]
+    return _fill(rng, cards)
+
+def _three_pairs(rng):
+    cards = []
+    for v in _distinct_values(rng, 3):
+        cards += [(v, suit) for suit in rng.sample(SUITS, 2)]
+    return _fill(rng, cards)
+
+def _quads_and_trips(rng):
+    quads, trips = _distinct_values(rng, 2)
+    return [(quads, suit) for suit in SUITS] + [(trips, suit) for suit in rng.sample(SUITS, 3)]
+
+def _big_flush(rng):
+    suit = rng.choice(SUITS)
+    size = rng.choice([6, 7])
+    return _fill(rng, [(v, suit) for v in rng.sample(range(2, 15), size)])
+
+def _straight_flush_under_straight(rng):
+    suit = rng.choice(SUITS)
+    low = rng.randint(2, 9)
+    cards = [(v, suit) for v in range(low, low + 5)]
+    cards.append((low + 5, rng.choice([s for s in SUITS if s != suit])))
+    return _fill(rng, cards)
+
+def _long_straight(rng):
+    low = rng.randint(2, 8)
+    return _fill(rng, [(v, rng.choice(SUITS)) for v in range(low, low + rng.choice([6, 7]))])
+
+# Straight with three of its cards in the flush suit, plus two more of that suit
+def _flush_and_straight(rng):
+    suit = rng.choice(SUITS)
+    low = rng.randint(2, 10)
+    values = list(range(low, low + 5))
+    others = [s for s in SUITS if s != suit]
+    cards = [(v, suit) for v in values[:3]] + [(v, rng.choice(others)) for v in values[3:]]
+    return cards + [(v, suit) for v in _distinct_values(rng, 2, exclude=values)]
+
+ADVERSARIAL = [_wheel, _wheel_straight_flush, _two_trips, _three_pairs, _quads_and_trips, _big_flush,
+               _straight_flush_under_straight, _long_straight, _flush_and_straight]
+
+def random_hands(n, seed=0):
+    rng = random.Random(seed)
+    return [rng.sample(DECK, 7) for i in range(n)]
+
+def adversarial_hands(n, seed=0):
+    rng = random.Random(seed)
+    return [ADVERSARIAL[i % len(ADVERSARIAL)](rng) for i in range(n)]
+
+# Mismatches between `strengths` and the reference ranks: equal ranks must
+# give equal strengths and a higher rank a higher strength
+def order_mismatches(hands, ranks, strengths):
+    order = sorted(range(len(hands)), key=lambda i: ranks[i])
+    mismatches = []
+    for i, j in zip(order, order[1:]):
+        if (ranks[i] == ranks[j]) != (strengths[i] == strengths[j]) or strengths[i] > strengths[j]:
+            mismatches.append((hands[i], hands[j]))
+    return mismatches
+
+def _compare(first, second):
+    return 1 if first > second else 2 if first < second else 0
+
+def check_evaluator(hands):
+    ranks = [reference_rank(hand) for hand in hands]
+    strengths = [evaluate(encode(hand)) for hand in hands]
+    failures = order_mismatches(hands, ranks, strengths)
+    failures += [hand for hand, rank, strength in zip(hands, ranks, strengths)
+                 if hand_category(strength) != rank[0] or check_hand(hand) != rank[0]]
+    # Board summarised first, hole cards added on top
+    failures += [hand for hand, strength in zip(hands, strengths)
+                 if evaluate_hole(board_state(encode(hand[2:])), encode(hand[:2])) != strength]
+    # break_tie and game_result on neighbouring hands, mostly of the same category
+    pairs = sorted(range(len(hands)), key=lambda i: ranks[i])
+    for i, j in zip(pairs, pairs[1:]):
+        if break_tie(hands[i], hands[j]) != _compare(ranks[i], ranks[j]):
+            failures.append((hands[i], hands[j]))
+    for i, j in zip(pairs[::2], pairs[1::2]):
+        board = hands[i][2:]
+        if any(card in board for card in hands[j][:2]):
+            continue
+        expected = {1: 'Win', 2: 'Loss', 0: 'Tie'}[_compare(reference_rank(hands[i][:2] + board),
+                                                            reference_rank(hands[j][:2] + board))]
+        if game_result(hands[i][:2], [hands[j][:2]], board) != expected:
+            failures.append((hands[i], hands[j]))
+    return failures
+
+def check_batch(n, seed=0, chunk=200000):
+    rng = np.random.default_rng(seed)
+    failures = 0
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        cards = deal_batch(np.arange(52), size, 7, rng)
+        expected = np.array([evaluate(hand) for hand in cards.tolist()])
+        failures += int((evaluate_batch(cards) != expected).sum())
+        # Board counted once, hole cards added per row
+        board = cards[0, 2:]
+        holes = np.array([hand for hand in cards[:, :2].tolist() if not set(hand) & set(board.tolist())])
+        boards = np.broadcast_to(board, (len(holes), 5))
+        failures += int((evaluate_batch(holes, card_counts(board[None, :])) !=
+                         evaluate_batch(np.hstack([holes, boards]))).sum())
+    adversarial = np.array([encode(hand) for hand in adversarial_hands(20000, seed)])
+    failures += int((evaluate_batch(adversarial) != [evaluate(hand) for hand in adversarial.tolist()]).sum())
+    return failures
+
+# z-score of a chi-square statistic; |z| above 5 means the deal isn't uniform
+def _chi_square_z(observed, expected, dof):
+    statistic = float(((observed - expected) ** 2 / expected).sum())
+    return (statistic - dof) / np.sqrt(2 * dof)
+
+# Counts of each card at each of the 7 dealt positions
+def check_dealers(n, seed=0):
+    rng = np.random.default_rng(seed)
+    results = {}
+    dealer = Dealer(rng=rng)
+    positions = np.zeros((7, 52))
+    for i in range(n):
+        positions[np.arange(7), dealer.deal(7)] += 1
+    results['Dealer.deal'] = _chi_square_z(positions, n / 52, 7 * 51)
+    dealt = deal_batch(np.arange(52), n, 7, rng)
+    positions = np.stack([np.bincount(dealt[:, i], minlength=52) for i in range(7)])
+    results['deal_batch'] = _chi_square_z(positions, n / 52, 7 * 51)
+    combos = np.bincount(POCKET_INDEX[dealt[:, 0], dealt[:, 1]], minlength=1326)
+    results['deal_batch pockets'] = _chi_square_z(combos, n / 1326, 1325)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.oracle', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--hands', type=int, default=20000, help='random hands checked against the reference')
+    parser.add_argument('--adversarial', type=int, default=20000, help='adversarial hands checked against it')
+    parser.add_argument('--batch-hands', type=int, default=1000000, help='hands for the batch evaluator')
+    parser.add_argument('--deals', type=int, default=100000, help='deals for the dealer uniformity checks')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name, hands in [('random', random_hands(args.hands, args.seed)),
+                        ('adversarial', adversarial_hands(args.adversarial, args.seed))]:
+        failures = check_evaluator(hands)
+        print('evaluator vs reference, %d %s hands: %d mismatches' % (len(hands), name, len(failures)))
+        for failure in failures[:5]:
+            print('   ', failure)
+        failed |= bool(failures)
+
+    failures = check_batch(args.batch_hands, args.seed)
+    print('evaluate_batch vs evaluate, %d hands: %d mismatches' % (args.batch_hands, failures))
+    failed |= bool(failures)
+
+    for name, z in check_dealers(args.deals, args.seed).items():
+        print('%s uniformity over %d deals: z = %.2f' % (name, args.deals, z))
+        failed |= abs(z) > 5
+
+    print('FAILED' if failed else 'OK')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
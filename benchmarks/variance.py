@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Variance-reduction benchmark
+
+    python -m benchmarks.variance --sims 20000 --hands AA AKs T9s 72o
+
+Runs every estimator in poker.variance for each hand against 1..8 opponents
+and reports effective samples per second: the number of plain deals that
+would give the same standard error, p (1 - p) / SE^2, divided by the time
+taken. Ratios above 1 mean an estimator buys the same precision for less CPU
+than plain sampling. One-off enumerations, the control estimator's category
+distributions and the flop strata, are timed separately and left out of the
+rates.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from poker.evaluator import encode
+from poker.starting_hands import class_representative
+from poker.variance import METHODS, category_distribution, estimate, flop_strata
+
+def effective_rates(hands, sims, opponent_counts=range(1, 9), seed=0, batch_size=10000):
+    setup = time.perf_counter()
+    for label in hands:
+        category_distribution(label)
+        flop_strata(tuple(encode(class_representative(label))))
+    setup = time.perf_counter() - setup
+    rates = {}
+    for n in opponent_counts:
+        for method in METHODS:
+            rng = np.random.default_rng([seed, n])
+            effective = seconds = 0.0
+            for label in hands:
+                start = time.perf_counter()
+                result = estimate(class_representative(label), n, sims, method, batch_size, rng)
+                seconds += time.perf_counter() - start
+                p = result.win_pct / 100
+                effective += p * (1 - p) / (result.std_error / 100) ** 2
+            rates[n, method] = effective / seconds
+    return rates, setup
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.variance', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sims', type=int, default=20000, help='deals per estimate')
+    parser.add_argument('--hands', nargs='+', default=['AA', 'AKs', 'QJo', 'T9s', '55', '72o'])
+    parser.add_argument('--max-opponents', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rates, setup = effective_rates(args.hands, args.sims, range(1, args.max_opponents + 1), args.seed)
+    print('Category distributions and flop strata for %d classes: %.1f s' % (len(args.hands), setup))
+    print('%-10s' % 'opponents' + ''.join('%24s' % method for method in METHODS))
+    for n in range(1, args.max_opponents + 1):
+        plain = rates[n, 'plain']
+        print('%-10d' % n + ''.join('%14.0f/s (%4.2fx)' % (rates[n, method], rates[n, method] / plain)
+                                    for method in METHODS))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Poker Monte Carlo library code
+"""
@@ -0,0 +1,3 @@
+from poker.cli import main
+
+main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive-precision equity
+
+Simulates in batches and stops as soon as the Wilson score interval of the
+win rate is narrower than a requested tolerance, or when the sim cap is hit.
+Percentages count ties as wins, like game().
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from poker.batch import default_rng, simulate_batch, simulate_batch_shared
+
+EquityEstimate = namedtuple('EquityEstimate', ['win_pct', 'ci_low', 'ci_high', 'sims'])
+
+# Wilson score interval for successes out of trials, as fractions
+def wilson_interval(successes, trials, z=1.96):
+    p = successes / trials
+    denominator = 1 + z ** 2 / trials
+    center = (p + z ** 2 / (2 * trials)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2)) / denominator
+    return center - half_width, center + half_width
+
+def _estimate(wins, trials, z):
+    low, high = wilson_interval(wins, trials, z)
+    return EquityEstimate(wins / trials * 100, float(low) * 100, float(high) * 100, trials)
+
+# Run run_batch(n) until every interval's half-width is at most tolerance
+# percentage points. run_batch returns (..., 3) arrays of (wins, ties, losses).
+def _run_until(run_batch, tolerance, max_sims, batch_size, z):
+    counts = None
+    sims = 0
+    while sims < max_sims:
+        n_games = min(batch_size, max_sims - sims)
+        batch = np.asarray(run_batch(n_games))
+        counts = batch if counts is None else counts + batch
+        sims += n_games
+        low, high = wilson_interval(counts[..., 0] + counts[..., 1], sims, z)
+        if np.max(high - low) * 100 / 2 <= tolerance:
+            break
+    return counts, sims
+
+# (wins, ties, losses) counts and sims used for players_hand against
+# num_other_players, simulated until the win percentage's confidence
+# interval is within +/- tolerance percentage points
+def adaptive_counts(players_hand, num_other_players, tolerance=0.5, max_sims=100000, num_of_folding_players=0,
+                    batch_size=1000, rng=None, board=None, z=1.96, ranges=None):
+    rng = default_rng(rng)
+    return _run_until(
+        lambda n_games: simulate_batch(players_hand, num_other_players, n_games, num_of_folding_players, rng, board,
+                                       ranges),
+        tolerance, max_sims, batch_size, z)
+
+# Same for every opponent count 1..max_other_players from shared deals; runs
+# until the widest of the intervals is within tolerance. Counts are a
+# (max_other_players, 3) array.
+def adaptive_counts_shared(players_hand, max_other_players, tolerance=0.5, max_sims=100000,
+                           num_of_folding_players=0, batch_size=1000, rng=None, board=None, z=1.96):
+    rng = default_rng(rng)
+    return _run_until(
+        lambda n_games: simulate_batch_shared(players_hand, max_other_players, n_games, num_of_folding_players,
+                                              rng, board),
+        tolerance, max_sims, batch_size, z)
+
+def adaptive_equity(players_hand, num_other_players, tolerance=0.5, max_sims=100000, num_of_folding_players=0,
+                    batch_size=1000, rng=None, board=None, z=1.96, ranges=None):
+    counts, sims = adaptive_counts(players_hand, num_other_players, tolerance, max_sims, num_of_folding_players,
+                                   batch_size, rng, board, z, ranges)
+    return _estimate(int(counts[0] + counts[1]), sims, z)
+
+# One EquityEstimate per opponent count 1..max_other_players
+def adaptive_equity_shared(players_hand, max_other_players, tolerance=0.5, max_sims=100000,
+                           num_of_folding_players=0, batch_size=1000, rng=None, board=None, z=1.96):
+    counts, sims = adaptive_counts_shared(players_hand, max_other_players, tolerance, max_sims,
+                                          num_of_folding_players, batch_size, rng, board, z)
+    return [_estimate(int(wins + ties), sims, z) for wins, ties, losses in counts]
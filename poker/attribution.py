@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+All-seats attribution
+
+The pocket-hand sweep fixes one hand and deals its opponents, so of the n
+hands evaluated per deal only the hero's result is kept. Here every deal is a
+fully random game and every seat's result is credited to its own hole-card
+combo: one pass over the deals fills the win percentage of all 1,326 combos,
+and of the 169 classes, at once. Deals are dealt for max_opponents + 1 seats
+and the game against k opponents is read off the first k + 1 seats, so every
+opponent count comes from the same evaluations.
+
+Counters are kept per (opponent count, combo): trials, the summed deal
+weights, weighted wins and ties, and the squared-weight sums behind a standard
+error. Without importance reweighting every weight is 1 and the standard
+error is the usual sqrt(p (1 - p) / trials).
+
+Uniform deals give each class trials in proportion to its combos: offsuit
+classes get three times as many as suited ones, twice as many as pairs. With
+importance=True, seat 0 is dealt from a proposal that picks every class
+equally often and each deal is weighted by the likelihood ratio of seat 0's
+combo, 169 * combos in its class / 1326. The other seats are dealt uniformly
+from the remaining cards as before, so the weighted estimates stay unbiased
+for every seat.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from poker import instrument
+from poker.batch import hands_strength
+from poker.dealing import deal_batch, default_rng
+from poker.pockets import NUM_COMBOS, POCKET_INDEX, pocket_cards
+from poker.ranges import Range, deal_ranged
+from poker.starting_hands import CLASS_COMBOS, HAND_CLASSES, hand_class
+from poker.sweep import _merge_stats, _run_instrumented
+
+# Index into HAND_CLASSES of every combo
+COMBO_CLASS = np.array([HAND_CLASSES.index(hand_class(pocket_cards(i))) for i in range(NUM_COMBOS)])
+
+# Class-uniform proposal for seat 0 and its likelihood ratios per combo
+CLASS_UNIFORM = Range.from_classes({label: 1 / CLASS_COMBOS[label] for label in HAND_CLASSES})
+IMPORTANCE_WEIGHTS = np.array([len(HAND_CLASSES) * CLASS_COMBOS[HAND_CLASSES[c]] / NUM_COMBOS
+                               for c in COMBO_CLASS])
+
+FIELDS = ['trials', 'weight', 'wins', 'ties', 'weight_sq', 'weight_sq_score']
+
+class SeatCounts:
+    # One (max_opponents, units) array per field; units are combos or classes
+    def __init__(self, max_opponents, units=NUM_COMBOS, arrays=None):
+        self.max_opponents = max_opponents
+        if arrays is None:
+            arrays = {field: np.zeros((max_opponents, units)) for field in FIELDS}
+        self.arrays = arrays
+
+    def __getattr__(self, field):
+        if field in FIELDS:
+            return self.arrays[field]
+        raise AttributeError(field)
+
+    def merge(self, other):
+        for field in FIELDS:
+            self.arrays[field] += other.arrays[field]
+
+    # Win percentages, ties counting as wins as in game(); NaN without trials
+    def win_pct(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (self.wins + self.ties) / self.weight * 100
+
+    # Standard error of win_pct, from the self-normalised importance estimate
+    # sum(w x) / sum(w) with x = 1 for a win or tie: its variance is about
+    # sum(w^2 (x - p)^2) / sum(w)^2
+    def std_error(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            p = (self.wins + self.ties) / self.weight
+            variance = ((1 - 2 * p) * self.weight_sq_score + p ** 2 * self.weight_sq) / self.weight ** 2
+        return np.sqrt(variance) * 100
+
+    # Trials that would give the same variance without weights: sum(w)^2 / sum(w^2)
+    def effective_trials(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.weight ** 2 / self.weight_sq
+
+    # The same counters summed over the combos of each class
+    def by_class(self):
+        arrays = {field: np.stack([np.bincount(COMBO_CLASS, weights=row, minlength=len(HAND_CLASSES))
+                                   for row in array])
+                  for field, array in self.arrays.items()}
+        return SeatCounts(self.max_opponents, len(HAND_CLASSES), arrays)
+
+# Deal n_games random games of max_opponents + 1 players and credit every
+# seat's win, tie or loss against 1..max_opponents opponents to its combo
+def seat_counts_batch(max_opponents, n_games, rng=None, importance=False):
+    rng = default_rng(rng)
+    clock = instrument.clock()
+    seats = max_opponents + 1
+    if importance:
+        hands, boards = deal_ranged([], [CLASS_UNIFORM] + [None] * max_opponents, n_games, 5, rng)
+    else:
+        dealt = deal_batch(np.arange(52), n_games, 2 * seats + 5, rng)
+        hands = dealt[:, :2 * seats].reshape(n_games, seats, 2)
+        boards = dealt[:, 2 * seats:]
+    combos = POCKET_INDEX[hands[:, :, 0], hands[:, :, 1]]
+    weights = IMPORTANCE_WEIGHTS[combos[:, 0]] if importance else np.ones(n_games)
+    clock.lap('deal')
+    strengths = hands_strength(hands, boards)
+    clock.lap('evaluate')
+
+    counts = SeatCounts(max_opponents)
+    for k in range(1, seats):
+        strength = strengths[:, :k + 1]
+        best = strength.max(axis=1, keepdims=True)
+        on_top = strength == best
+        split = on_top.sum(axis=1, keepdims=True) > 1
+        seat_combos = combos[:, :k + 1].ravel()
+        seat_weights = np.broadcast_to(weights[:, None], strength.shape).ravel()
+        wins = (on_top & ~split).ravel()
+        ties = (on_top & split).ravel()
+        row = {'trials': np.ones_like(seat_weights), 'weight': seat_weights, 'wins': seat_weights * wins,
+               'ties': seat_weights * ties, 'weight_sq': seat_weights ** 2,
+               'weight_sq_score': seat_weights ** 2 * (wins | ties)}
+        for field, values in row.items():
+            counts.arrays[field][k - 1] = np.bincount(seat_combos, weights=values, minlength=NUM_COMBOS)
+    clock.lap('aggregate')
+    instrument.count('sims', n_games)
+    instrument.count('hand evaluations', n_games * seats)
+    return counts
+
+def simulate_seat_counts(max_opponents, game_sims, batch_size=10000, rng=None, importance=False):
+    rng = default_rng(rng)
+    counts = SeatCounts(max_opponents)
+    for start in range(0, game_sims, batch_size):
+        counts.merge(seat_counts_batch(max_opponents, min(batch_size, game_sims - start), rng, importance))
+    return counts
+
+def _run_round(args):
+    seed, round_index, max_opponents, game_sims, batch_size, importance = args
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(round_index,)))
+    return simulate_seat_counts(max_opponents, game_sims, batch_size, rng, importance).arrays
+
+def _save(counts, rounds_done, path):
+    temporary = '%s.%d.tmp.npz' % (path, os.getpid())
+    np.savez(temporary, rounds_done=rounds_done, **counts.arrays)
+    os.replace(temporary, path)
+
+# SeatCounts from game_sims random deals, split into rounds of round_sims
+# deals. Each round has its own Generator keyed by its index, so the result is
+# the same for any number of workers, and finished rounds are saved to
+# `checkpoint` (an .npz file) so an interrupted run resumes after them.
+def attribute_seats(game_sims, max_opponents=8, batch_size=10000, seed=0, importance=False, workers=None,
+                    round_sims=100000, checkpoint=None):
+    rounds = [min(round_sims, game_sims - start) for start in range(0, game_sims, round_sims)]
+    counts = SeatCounts(max_opponents)
+    rounds_done = 0
+    if checkpoint and os.path.exists(checkpoint):
+        with np.load(checkpoint) as saved:
+            counts = SeatCounts(max_opponents, arrays={field: saved[field] for field in FIELDS})
+            rounds_done = int(saved['rounds_done'])
+
+    units = [(seed, i, max_opponents, rounds[i], batch_size, importance) for i in range(rounds_done, len(rounds))]
+    workers = workers or os.cpu_count()
+    executor = None
+    if workers == 1 or len(units) <= 1:
+        results = map(_run_round, units)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        if instrument.active():
+            results = _merge_stats(executor.map(_run_instrumented, [(_run_round, unit) for unit in units]))
+        else:
+            results = executor.map(_run_round, units)
+    progress = instrument.progress(len(rounds), 'attribution', 'rounds')
+    progress.update(rounds_done)
+    try:
+        for arrays in results:
+            counts.merge(SeatCounts(max_opponents, arrays=arrays))
+            rounds_done += 1
+            if checkpoint:
+                _save(counts, rounds_done, checkpoint)
+            progress.update()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return counts
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Batched NumPy simulation engine
+
+Evaluates many hands at once with array operations and returns the same
+integer strengths as poker.evaluator.evaluate, so results from both paths can
+be compared and mixed freely.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from poker import instrument
+from poker.dealing import deal_batch, default_rng
+from poker.evaluator import CATEGORY_SHIFT, HAND_TYPES, encode
+from poker.outcomes import result_codes
+from poker.ranges import deal_ranged, opponent_ranges
+from poker.tables import evaluator_tables
+
+RANK_POWERS = 1 << np.arange(13, dtype=np.int64)
+
+# 13-bit rank mask tables (bit 0 = deuce), mapped from a shared file when
+# POKER_TABLES is set; see poker.tables. They are built or mapped on the
+# first evaluation rather than at import, so importing stays cheap and
+# POKER_TABLES only has to be set before the first hand is evaluated.
+@lru_cache(maxsize=None)
+def _lookup_tables():
+    tables = evaluator_tables()
+    return (tables['high_bit'], tables['high_value'], [tables['top_values_%d' % k] for k in range(6)],
+            tables['straight_top'], tables['flush_strength'])
+
+def _category(category):
+    return category << CATEGORY_SHIFT
+
+# Rank counts (M, 13), suit counts (M, 4) and per-suit rank masks (M, 4) of
+# an (M, k) array of encoded cards. Counts of `base` cards that every row
+# shares, from an earlier card_counts call, are added on, so a known board is
+# only counted once.
+def card_counts(cards, base=None):
+    cards = np.asarray(cards, dtype=np.int64)
+    m = cards.shape[0]
+    ranks = cards >> 2
+    suits = cards & 3
+    rows = np.arange(m)[:, None]
+
+    rank_counts = np.bincount((rows * 13 + ranks).ravel(), minlength=m * 13).reshape(m, 13)
+    suit_counts = np.bincount((rows * 4 + suits).ravel(), minlength=m * 4).reshape(m, 4)
+    # Cards of one suit can't repeat a rank, so summing their bits is an OR
+    suit_masks = np.bincount((rows * 4 + suits).ravel(), weights=(1 << ranks).ravel(),
+                             minlength=m * 4).reshape(m, 4).astype(np.int64)
+    if base is not None:
+        rank_counts = rank_counts + base[0]
+        suit_counts = suit_counts + base[1]
+        suit_masks = suit_masks + base[2]
+    return rank_counts, suit_counts, suit_masks
+
+# Evaluate an (M, k) array of encoded cards, 5 <= k <= 7, into M strengths
+def evaluate_batch(cards, base=None):
+    return strength_from_counts(*card_counts(cards, base))
+
+# Strengths from card_counts output
+def strength_from_counts(rank_counts, suit_counts, suit_masks):
+    high_bit, high_value, top_values, straight_top, flush_strength = _lookup_tables()
+    m = rank_counts.shape[0]
+    any_mask = (rank_counts > 0) @ RANK_POWERS
+    pair_mask = (rank_counts == 2) @ RANK_POWERS
+    trips_mask = (rank_counts == 3) @ RANK_POWERS
+    quads_mask = (rank_counts == 4) @ RANK_POWERS
+
+    flush_suit = suit_counts.argmax(axis=1)
+    is_flush = suit_counts.max(axis=1) >= 5
+    flush_mask = suit_masks[np.arange(m), flush_suit]
+
+    top_trips = high_bit[trips_mask]
+    top_pairs = top_values[2][pair_mask]
+    pairs_bits = high_bit[pair_mask] | high_bit[pair_mask & ~high_bit[pair_mask]]
+    straight = straight_top[any_mask]
+
+    quads = (_category(8) | high_value[quads_mask] << 16
+             | high_value[any_mask & ~high_bit[quads_mask]] << 12)
+    full_house = (_category(7) | high_value[trips_mask] << 16
+                  | high_value[(trips_mask & ~top_trips) | pair_mask] << 12)
+    straights = _category(5) | straight << 16
+    trips = (_category(4) | high_value[trips_mask] << 16
+             | top_values[2][any_mask & ~top_trips] << 8)
+    two_pairs = _category(3) | top_pairs << 12 | high_value[any_mask & ~pairs_bits] << 8
+    one_pair = (_category(2) | high_value[pair_mask] << 16
+                | top_values[3][any_mask & ~pair_mask] << 4)
+    high_card = _category(1) | top_values[5][any_mask]
+
+    has_trips = trips_mask > 0
+    conditions = [
+        is_flush,
+        quads_mask > 0,
+        has_trips & ((trips_mask & ~top_trips > 0) | (pair_mask > 0)),
+        straight > 0,
+        has_trips,
+        (pair_mask & ~high_bit[pair_mask]) > 0,
+        pair_mask > 0,
+    ]
+    choices = [flush_strength[flush_mask], quads, full_house, straights, trips, two_pairs, one_pair]
+    return np.select(conditions, choices, default=high_card)
+
+# (N, k) strengths of k hands per deal; hands_cards is (N, k, 2), boards (N, 5).
+# Each board is counted once and only the hole cards are counted per hand.
+def hands_strength(hands_cards, boards):
+    n_games, num_hands = hands_cards.shape[:2]
+    board_counts = card_counts(boards)
+    hole_counts = card_counts(hands_cards.reshape(n_games * num_hands, -1))
+    counts = [(hole.reshape(n_games, num_hands, -1) + board[:, None]).reshape(n_games * num_hands, -1)
+              for hole, board in zip(hole_counts, board_counts)]
+    return strength_from_counts(*counts).reshape(n_games, num_hands)
+
+# Strengths of the player's hand and of every other player's hand, per deal.
+# players_cards is (N, 2), others_cards (N, k, 2) and boards (N, 5).
+def showdown_batch(players_cards, others_cards, boards):
+    strengths = hands_strength(np.concatenate([players_cards[:, None], others_cards], axis=1), boards)
+    return strengths[:, 0], strengths[:, 1:]
+
+# Fold players the way holdem_simulation does: num_of_folding_players random
+# picks among all k opponents, repeats allowed. Folded hands get strength -1.
+def apply_folds(others_strength, num_of_folding_players, rng):
+    n_games, num_other_players = others_strength.shape
+    if not 0 < num_of_folding_players < num_other_players:
+        return others_strength
+    folding = rng.integers(0, num_other_players, (n_games, num_of_folding_players))
+    folded = np.zeros((n_games, num_other_players), dtype=bool)
+    folded[np.arange(n_games)[:, None], folding] = True
+    return np.where(folded, -1, others_strength)
+
+# (wins, ties, losses) of the player against the best other hand per deal
+def count_results(players_strength, best_other):
+    wins = int((players_strength > best_other).sum())
+    ties = int((players_strength == best_other).sum())
+    return wins, ties, len(players_strength) - wins - ties
+
+# Simulate n_games hold'em deals for a fixed player's hand and count the
+# player's (wins, ties, losses). Folding follows holdem_simulation. Cards of a
+# known board are kept and only the rest of the board is dealt. `ranges` is a
+# poker.ranges.Range for every opponent or a list with a Range or None
+# (uniformly random) per opponent. Every deal is logged to `outcomes`, a
+# poker.outcomes.OutcomeLog, if one is given.
+def simulate_batch(players_hand, num_other_players, n_games, num_of_folding_players=0, rng=None,
+                   board=None, ranges=None, outcomes=None):
+    rng = default_rng(rng)
+    clock = instrument.clock()
+    hero = np.array(encode(players_hand), dtype=np.int64)
+    known_board = np.array(encode(board or []), dtype=np.int64)
+    dead = np.concatenate([hero, known_board])
+    ranges = opponent_ranges(ranges, num_other_players)
+
+    # Burn cards don't change the distribution of the board, so they aren't dealt
+    if ranges:
+        others, rest = deal_ranged(dead, ranges, n_games, 5 - len(known_board), rng)
+    else:
+        dealt = deal_batch(np.setdiff1d(np.arange(52), dead), n_games, 2 * num_other_players + 5 - len(known_board),
+                           rng)
+        others = dealt[:, :2 * num_other_players].reshape(n_games, num_other_players, 2)
+        rest = dealt[:, 2 * num_other_players:]
+    boards = np.hstack([np.broadcast_to(known_board, (n_games, len(known_board))), rest])
+    clock.lap('deal')
+
+    players_strength, others_strength = showdown_batch(
+        np.broadcast_to(hero, (n_games, 2)), others, boards)
+    clock.lap('evaluate')
+
+    others_strength = apply_folds(others_strength, num_of_folding_players, rng)
+    best_other = others_strength.max(axis=1)
+    results = count_results(players_strength, best_other)
+    clock.lap('aggregate')
+    if outcomes is not None:
+        outcomes.append(np.concatenate([np.broadcast_to(hero, (n_games, 1, 2)), others], axis=1), boards,
+                        np.column_stack([players_strength, others_strength]),
+                        result_codes(players_strength, best_other))
+        clock.lap('log')
+    instrument.count('sims', n_games)
+    instrument.count('hand evaluations', n_games * (num_other_players + 1))
+    return results
+
+# Run game_sims deals in batches of batch_size and total the (wins, ties, losses)
+def simulate_games(players_hand, num_other_players, game_sims, num_of_folding_players=0,
+                   batch_size=10000, rng=None, board=None, ranges=None, outcomes=None):
+    rng = default_rng(rng)
+    wins = ties = losses = 0
+    for start in range(0, game_sims, batch_size):
+        batch_wins, batch_ties, batch_losses = simulate_batch(
+            players_hand, num_other_players, min(batch_size, game_sims - start),
+            num_of_folding_players, rng, board, ranges, outcomes)
+        wins += batch_wins
+        ties += batch_ties
+        losses += batch_losses
+    return wins, ties, losses
+
+# Common random numbers: every deal gives the player max_other_players
+# opponents, and the result against k opponents uses the first k of them.
+# Returns a (max_other_players, 3) array of (wins, ties, losses), row k - 1
+# holding the counts against k opponents.
+def simulate_batch_shared(players_hand, max_other_players, n_games, num_of_folding_players=0, rng=None,
+                          board=None):
+    rng = default_rng(rng)
+    clock = instrument.clock()
+    hero = np.array(encode(players_hand), dtype=np.int64)
+    known_board = np.array(encode(board or []), dtype=np.int64)
+    available = np.setdiff1d(np.arange(52), np.concatenate([hero, known_board]))
+
+    dealt = deal_batch(available, n_games, 2 * max_other_players + 5 - len(known_board), rng)
+    boards = np.hstack([np.broadcast_to(known_board, (n_games, len(known_board))),
+                        dealt[:, 2 * max_other_players:]])
+    others = dealt[:, :2 * max_other_players].reshape(n_games, max_other_players, 2)
+    clock.lap('deal')
+
+    players_strength, others_strength = showdown_batch(
+        np.broadcast_to(hero, (n_games, 2)), others, boards)
+    clock.lap('evaluate')
+    # Best hand among the first k opponents, for every k at once
+    best_others = np.maximum.accumulate(others_strength, axis=1)
+
+    results = np.zeros((max_other_players, 3), dtype=np.int64)
+    for k in range(1, max_other_players + 1):
+        if 0 < num_of_folding_players < k:
+            best_other = apply_folds(others_strength[:, :k], num_of_folding_players, rng).max(axis=1)
+        else:
+            best_other = best_others[:, k - 1]
+        results[k - 1] = count_results(players_strength, best_other)
+    clock.lap('aggregate')
+    instrument.count('sims', n_games)
+    instrument.count('hand evaluations', n_games * (max_other_players + 1))
+    return results
+
+def simulate_games_shared(players_hand, max_other_players, game_sims, num_of_folding_players=0,
+                          batch_size=10000, rng=None, board=None):
+    rng = default_rng(rng)
+    results = np.zeros((max_other_players, 3), dtype=np.int64)
+    for start in range(0, game_sims, batch_size):
+        results += simulate_batch_shared(players_hand, max_other_players, min(batch_size, game_sims - start),
+                                         num_of_folding_players, rng, board)
+    return results
+
+# Deal n_games showdowns between num_of_players random hands and count the
+# category of each winning hand, as an array indexed like HAND_TYPES. Deals
+# are logged to `outcomes` with seat 0 as the hero.
+def winning_categories_batch(num_of_players, n_games, rng=None, outcomes=None):
+    rng = default_rng(rng)
+    clock = instrument.clock()
+    dealt = deal_batch(np.arange(52), n_games, 2 * num_of_players + 5, rng)
+    hands = dealt[:, :2 * num_of_players].reshape(n_games, num_of_players, 2)
+    boards = dealt[:, 2 * num_of_players:]
+    clock.lap('deal')
+    strengths = hands_strength(hands, boards)
+    best = strengths.max(axis=1)
+    clock.lap('evaluate')
+    counts = np.bincount(best >> CATEGORY_SHIFT, minlength=len(HAND_TYPES))
+    clock.lap('aggregate')
+    if outcomes is not None:
+        outcomes.append(hands, boards, strengths, result_codes(strengths[:, 0], strengths[:, 1:].max(axis=1)))
+        clock.lap('log')
+    instrument.count('sims', n_games)
+    instrument.count('hand evaluations', n_games * num_of_players)
+    return counts
+
+def simulate_winning_categories(num_of_players, game_sims, batch_size=10000, rng=None, outcomes=None):
+    rng = default_rng(rng)
+    counts = np.zeros(len(HAND_TYPES), dtype=np.int64)
+    for start in range(0, game_sims, batch_size):
+        counts += winning_categories_batch(num_of_players, min(batch_size, game_sims - start), rng, outcomes)
+    return counts
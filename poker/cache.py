@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent equity cache
+
+Stores accumulated (wins, ties, trials) per starting-hand class, opponent
+count and number of folding players in an SQLite file. Later runs reuse the
+stored samples and only simulate the shortfall, adding to the totals. Rows
+written by another evaluator version are dropped when the cache is opened.
+"""
+
+import sqlite3
+
+from poker.evaluator import EVALUATOR_VERSION
+
+class EquityCache:
+    def __init__(self, path='equity_cache.sqlite', version=EVALUATOR_VERSION):
+        self.path = path
+        self.version = version
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS equity ('
+            'hand_class TEXT, opponents INTEGER, folds INTEGER, '
+            'wins INTEGER, ties INTEGER, trials INTEGER, version INTEGER, '
+            'PRIMARY KEY (hand_class, opponents, folds))')
+        self.invalidate()
+        self.stats = {'hits': 0, 'partial hits': 0, 'misses': 0, 'deals reused': 0, 'deals run': 0}
+
+    # Drop rows from other evaluator versions; returns the number dropped
+    def invalidate(self, version=None):
+        cursor = self.connection.execute('DELETE FROM equity WHERE version != ?', (version or self.version,))
+        self.connection.commit()
+        return cursor.rowcount
+
+    def clear(self):
+        self.connection.execute('DELETE FROM equity')
+        self.connection.commit()
+
+    # Stored (wins, ties, trials), zeros if nothing is stored. `sims` is the
+    # number of trials the caller wants and only feeds the hit/miss counts.
+    def lookup(self, hand_class, num_other_players, num_of_folding_players=0, sims=0):
+        row = self.connection.execute(
+            'SELECT wins, ties, trials FROM equity WHERE hand_class = ? AND opponents = ? AND folds = ?',
+            (hand_class, num_other_players, num_of_folding_players)).fetchone()
+        wins, ties, trials = row or (0, 0, 0)
+        if trials == 0:
+            self.stats['misses'] += 1
+        elif trials >= sims:
+            self.stats['hits'] += 1
+        else:
+            self.stats['partial hits'] += 1
+        return wins, ties, trials
+
+    # Add newly simulated counts to the stored totals
+    def add(self, hand_class, num_other_players, num_of_folding_players, wins, ties, trials):
+        self.connection.execute(
+            'INSERT INTO equity VALUES (?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (hand_class, opponents, folds) DO UPDATE SET '
+            'wins = wins + excluded.wins, ties = ties + excluded.ties, trials = trials + excluded.trials',
+            (hand_class, num_other_players, num_of_folding_players, wins, ties, trials, self.version))
+
+    # Deals taken from the cache and simulated, reported by the caller: with
+    # shared deals one deal fills a cell for every opponent count, so the
+    # cells' trials would overstate the work
+    def count_deals(self, reused=0, run=0):
+        self.stats['deals reused'] += reused
+        self.stats['deals run'] += run
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def report(self):
+        return dict(self.stats)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Command-line interface
+
+    python -m poker equity AsKh --opponents 3 --board "Qs Js 2d"
+    python -m poker equity AsKh --opponents 2 --range "QQ+ AKs AKo:0.5"
+    python -m poker equity AsKh --opponents 3 --estimator control
+    python -m poker --headsup headsup.bin equity AsKh --range "QQ+ AKs"
+    python -m poker sweep --sims 10000 --workers 8 --output pocket_hands.csv
+    python -m poker sweep --attribution --sims 2000000 --class-output pocket_classes.csv
+    python -m poker what-wins --sims 10000 --output winning_poker_hands.csv
+    python -m poker equity AsKh --opponents 3 --sims 1000000 --record outcomes/
+    python -m poker pocket-frequency --sims 10000 --output pocket_cards_frequency.csv
+    python -m poker serve --port 8765 --workers 4
+    python -m poker loadtest --port 8765 --requests 2000 --concurrency 32
+
+Only the subcommand that runs is imported, so `equity` never loads pandas.
+"""
+
+import argparse
+import os
+
+def _equity(args):
+    import numpy as np
+    from poker.evaluator import parse_cards
+    from poker.exact import EXACT_THRESHOLD
+    from poker.ranges import Range
+    from poker.simulation import game
+    np.random.seed(args.seed)
+    if args.estimator:
+        from poker.variance import estimate
+        if args.board or args.range or args.folds:
+            raise SystemExit('--estimator only covers preflop spots against random opponents')
+        result = estimate(parse_cards(args.hand), args.opponents, args.sims, args.estimator, args.batch_size)
+        print('%.2f +/- %.2f' % (result.win_pct, result.std_error))
+        return
+    board = parse_cards(args.board) if args.board else None
+    exact_threshold = EXACT_THRESHOLD if args.exact_threshold is None else args.exact_threshold
+    ranges = Range.parse(args.range) if args.range else None
+    outcomes = None
+    if args.record:
+        from poker.outcomes import OutcomeLog
+        outcomes = OutcomeLog(args.record, args.opponents + 1)
+    win_pct = game(parse_cards(args.hand), args.opponents, args.sims, args.folds, args.batch_size, board,
+                   exact_threshold, args.tolerance, ranges, outcomes)
+    if outcomes is not None:
+        outcomes.close()
+    print('%.2f' % win_pct)
+
+def _sweep(args):
+    if args.attribution:
+        from poker.reports import attributed_pocket_hands_table
+        hands_df, class_df = attributed_pocket_hands_table(args.sims, args.batch_size, args.workers, args.seed,
+                                                           args.importance, args.checkpoint_dir, args.max_opponents)
+        hands_df.to_csv(args.output)
+        if args.class_output:
+            class_df.to_csv(args.class_output)
+        print('Wrote', len(hands_df), 'rows to', args.output)
+        return
+    from poker.cache import EquityCache
+    from poker.reports import pocket_hands_table
+    cache = EquityCache(args.cache) if args.cache else None
+    try:
+        hands_df = pocket_hands_table(args.sims, args.folds, args.batch_size, args.workers, args.seed,
+                                      args.shared_deals, args.tolerance, checkpoint_dir=args.checkpoint_dir,
+                                      max_opponents=args.max_opponents, cache=cache)
+    finally:
+        if cache is not None:
+            print(cache.report())
+            cache.close()
+    hands_df.to_csv(args.output)
+    print('Wrote', len(hands_df), 'rows to', args.output)
+
+def _what_wins(args):
+    from poker.reports import what_wins_table
+    wins_df = what_wins_table(args.sims, args.seed, args.checkpoint_dir, batch_size=args.batch_size,
+                              record_dir=args.record)
+    wins_df.to_csv(args.output)
+    print(wins_df.to_string())
+
+def _pocket_frequency(args):
+    from poker.reports import pocket_frequency_table
+    hands_df, class_frequency_df = pocket_frequency_table(args.sims, args.seed, args.checkpoint_dir,
+                                                          batch_size=args.batch_size)
+    hands_df.to_csv(args.output)
+    if args.class_output:
+        class_frequency_df.to_csv(args.class_output)
+    print('Wrote', len(hands_df), 'rows to', args.output)
+
+def _serve(args):
+    import asyncio
+    from poker.service import serve
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, workers=args.workers, cache_size=args.cache_size,
+                          batch_window=args.batch_window / 1000, max_batch=args.max_batch))
+    except KeyboardInterrupt:
+        pass
+
+def _loadtest(args):
+    import asyncio
+    import json
+    from poker.service import load_test
+    report = asyncio.run(load_test(args.host, args.port, args.unix, args.requests, args.concurrency, args.distinct,
+                                   args.sims, args.seed))
+    print(json.dumps(report, indent=2))
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m poker', description="Texas Hold'em Monte Carlo simulations")
+    parser.add_argument('--progress', action='store_true', help='print progress, throughput and ETA')
+    parser.add_argument('--stats', metavar='PATH', default=None,
+                        help='write time per phase and simulation counts to this JSON file')
+    parser.add_argument('--cprofile', metavar='PATH', default=None,
+                        help='run under cProfile and dump pstats-readable stats here')
+    parser.add_argument('--tables', metavar='PATH', default=None,
+                        help='map the evaluator tables from this file, shared by every worker (built if missing)')
+    parser.add_argument('--headsup', metavar='PATH', default=None,
+                        help='answer heads-up preflop equity from this exact matrix (see python -m poker.headsup)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    equity = subparsers.add_parser('equity', help='win percentage of one hand (ties count as wins)')
+    equity.add_argument('hand', help="hole cards, e.g. 'AsKh'")
+    equity.add_argument('--opponents', type=int, default=1)
+    equity.add_argument('--board', help="known board cards, e.g. 'Qs Js 2d'")
+    equity.add_argument('--sims', type=int, default=10000)
+    equity.add_argument('--folds', type=int, default=0, help='opponents who fold before the showdown')
+    equity.add_argument('--range', default=None,
+                        help="every opponent's hand range, e.g. 'QQ+ AKs AKo' or '15%%' (default: any two cards)")
+    equity.add_argument('--batch-size', type=int, default=10000)
+    equity.add_argument('--exact-threshold', type=int, default=None,
+                        help='enumerate heads-up spots with at most this many deals')
+    equity.add_argument('--tolerance', type=float, default=None,
+                        help='stop once the win percentage is known to +/- this many points')
+    equity.add_argument('--estimator', choices=['plain', 'stratified', 'antithetic', 'control'], default=None,
+                        help='variance-reduced sampler; prints the win percentage with its standard error')
+    equity.add_argument('--record', metavar='DIR', default=None,
+                        help='simulate every deal and log it to this outcome log (see python -m poker.outcomes)')
+    equity.add_argument('--seed', type=int, default=0)
+    equity.set_defaults(run=_equity)
+
+    sweep = subparsers.add_parser('sweep', help='win percentages of every pocket hand')
+    sweep.add_argument('--sims', type=int, default=10000)
+    sweep.add_argument('--folds', type=int, default=0)
+    sweep.add_argument('--max-opponents', type=int, default=8)
+    sweep.add_argument('--batch-size', type=int, default=10000)
+    sweep.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    sweep.add_argument('--seed', type=int, default=0)
+    sweep.add_argument('--no-shared-deals', dest='shared_deals', action='store_false',
+                       help='simulate each opponent count from its own deals')
+    sweep.add_argument('--tolerance', type=float, default=None)
+    sweep.add_argument('--cache', default=None, help='SQLite equity cache to reuse and extend')
+    sweep.add_argument('--checkpoint-dir', default='checkpoints')
+    sweep.add_argument('--output', default='pocket_hands.csv')
+    sweep.add_argument('--attribution', action='store_true',
+                       help='deal --sims fully random games and credit every seat to its own hand')
+    sweep.add_argument('--importance', action='store_true',
+                       help='with --attribution, deal one seat class-uniformly and reweight')
+    sweep.add_argument('--class-output', default=None,
+                       help='with --attribution, write per-class win pcts, standard errors and effective trials here')
+    sweep.set_defaults(run=_sweep)
+
+    what_wins = subparsers.add_parser('what-wins', help='how often each hand category wins the showdown')
+    what_wins.add_argument('--sims', type=int, default=10000)
+    what_wins.add_argument('--batch-size', type=int, default=10000,
+                           help='games per NumPy batch; 0 plays one deal at a time')
+    what_wins.add_argument('--seed', type=int, default=0)
+    what_wins.add_argument('--checkpoint-dir', default='checkpoints')
+    what_wins.add_argument('--output', default='winning_poker_hands.csv')
+    what_wins.add_argument('--record', metavar='DIR', default=None,
+                           help='log every deal to an outcome log per player count under this directory')
+    what_wins.set_defaults(run=_what_wins)
+
+    frequency = subparsers.add_parser('pocket-frequency', help='how often each pocket hand is dealt')
+    frequency.add_argument('--sims', type=int, default=10000)
+    frequency.add_argument('--batch-size', type=int, default=10000,
+                           help='games per NumPy batch; 0 deals one game at a time')
+    frequency.add_argument('--seed', type=int, default=0)
+    frequency.add_argument('--checkpoint-dir', default='checkpoints')
+    frequency.add_argument('--output', default='pocket_cards_frequency.csv')
+    frequency.add_argument('--class-output', default=None, help='also write the per-class totals here')
+    frequency.set_defaults(run=_pocket_frequency)
+
+    serve = subparsers.add_parser('serve', help='answer equity and what-wins queries over HTTP')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--unix', default=None, help='listen on this Unix socket instead of a TCP port')
+    serve.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    serve.add_argument('--cache-size', type=int, default=10000, help='answers kept in the LRU cache')
+    serve.add_argument('--batch-window', type=float, default=2.0,
+                       help='milliseconds to gather queries into one batch')
+    serve.add_argument('--max-batch', type=int, default=64, help='queries that close a batch early')
+    serve.set_defaults(run=_serve)
+
+    loadtest = subparsers.add_parser('loadtest', help='concurrent equity queries against a running server')
+    loadtest.add_argument('--host', default='127.0.0.1')
+    loadtest.add_argument('--port', type=int, default=8765)
+    loadtest.add_argument('--unix', default=None)
+    loadtest.add_argument('--requests', type=int, default=1000)
+    loadtest.add_argument('--concurrency', type=int, default=16, help='connections sending queries at once')
+    loadtest.add_argument('--distinct', type=int, default=200, help='distinct spots the queries are drawn from')
+    loadtest.add_argument('--sims', type=int, default=10000)
+    loadtest.add_argument('--seed', type=int, default=0)
+    loadtest.set_defaults(run=_loadtest)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.tables:
+        # Read by poker.tables when poker.batch first evaluates, here and in workers
+        os.environ['POKER_TABLES'] = args.tables
+    if args.headsup:
+        os.environ['POKER_HEADSUP'] = args.headsup
+    if args.stats or args.progress:
+        from poker import instrument
+        instrument.enable(progress=args.progress)
+    if args.cprofile:
+        import cProfile
+        cProfile.runctx('args.run(args)', globals(), {'args': args}, args.cprofile)
+    else:
+        args.run(args)
+    if args.stats:
+        instrument.write_summary(args.stats)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Dealing
+
+Dealer draws only the cards a deal needs, by partial Fisher-Yates shuffle of
+the live cards: each card taken is swapped to the front of a reusable buffer
+from a random position further back. deal_batch does the same for a whole
+batch of deals at once, one column of swaps at a time.
+"""
+
+import numpy as np
+
+from poker.evaluator import decode
+
+def default_rng(rng=None):
+    # Draw from the global np.random state so np.random.seed still controls runs
+    if rng is None:
+        return np.random.default_rng(np.random.randint(2 ** 31))
+    return rng
+
+# Deal n_games sets of `count` distinct cards from `available` (encoded cards)
+def deal_batch(available, n_games, count, rng):
+    available = np.asarray(available, dtype=np.int8)
+    size = len(available)
+    if count > size:
+        raise ValueError('Cannot deal %d cards from %d' % (count, size))
+    decks = np.tile(available, (n_games, 1))
+    rows = np.arange(n_games)
+    offsets = np.arange(count)
+    picks = offsets + (rng.random((n_games, count)) * (size - offsets)).astype(np.intp)
+    for i in range(count):
+        chosen = decks[rows, picks[:, i]]
+        decks[rows, picks[:, i]] = decks[:, i]
+        decks[:, i] = chosen
+    return decks[:, :count].astype(np.int64)
+
+# Deal n_games sets of `count` cards from `available`, leaving out each row's
+# `held` cards (a 52-bit mask per row, as in poker.ranges). `extra` more cards
+# are dealt and the held ones dropped: what is left, in dealt order, is still
+# a uniform draw. `extra` must cover the held cards that are in `available`.
+def deal_batch_excluding(available, held, count, extra, rng):
+    dealt = deal_batch(available, len(held), min(count + extra, len(available)), rng)
+    is_held = (held[:, None] >> dealt) & 1 == 1
+    return np.take_along_axis(dealt, np.argsort(is_held, axis=1, kind='stable')[:, :count], axis=1)
+
+class Dealer:
+    # dead: encoded cards that are never dealt, such as the player's hand.
+    # Without an explicit Generator, draws come from the global np.random
+    # state so np.random.seed still controls runs.
+    def __init__(self, dead=(), rng=None):
+        self.rng = np.random if rng is None else rng
+        self.dead_mask = 0
+        self.live = list(range(52))
+        self.kill(dead)
+
+    # Take cards out of the deck for every later deal; cheap when they
+    # already are
+    def kill(self, cards):
+        dead_mask = self.dead_mask
+        for card in cards:
+            dead_mask |= 1 << card
+        if dead_mask != self.dead_mask:
+            self.dead_mask = dead_mask
+            self.live = [card for card in self.live if not dead_mask >> card & 1]
+
+    def is_dead(self, card):
+        return bool(self.dead_mask >> card & 1)
+
+    # `count` distinct live cards. The buffer needs no reset between deals:
+    # whatever order it was left in, the swaps give a uniform draw.
+    # `exclude` holds live cards kept out of this deal only, such as hands
+    # already drawn from a range; they are parked at the back of the buffer.
+    def deal(self, count, exclude=()):
+        live = self.live
+        size = len(live)
+        for card in exclude:
+            size -= 1
+            j = live.index(card)
+            live[j], live[size] = live[size], live[j]
+        if count > size:
+            raise ValueError('Cannot deal %d cards from %d' % (count, size))
+        for i, r in enumerate(self.rng.random(count).tolist()):
+            j = i + int(r * (size - i))
+            live[i], live[j] = live[j], live[i]
+        return live[:count]
+
+    # (n_games, count) array of deals
+    def deal_batch(self, n_games, count):
+        return deal_batch(self.live, n_games, count, self.rng)
+
+    # Uniform integer in [0, n)
+    def randint(self, n):
+        return int(self.rng.random() * n)
+
+# Functions to generate specific hand type
+def get_suited_cards(suit, cards):
+    potential_cards = list(filter(lambda x: x[1] == suit, cards))
+    return potential_cards
+
+def get_pair_cards(value, cards):
+    potential_cards = list(filter(lambda x: x[0] == value, cards))
+    return potential_cards
+
+def get_connected_cards(value, cards):
+    potential_cards = list(filter(lambda x: x[0] == value or x[0] == value + 1, cards))
+    return potential_cards
+  
+# Random two-card hand of a type: 'suited', 'pairs', 'connected' (values v
+# and v + 1) or 'connected_suited'
+def generate_hand(hand_type, rng=None):
+    dealer = Dealer(rng=rng)
+    if hand_type == 'suited':
+      suit = dealer.randint(4)
+      dealer.kill([card for card in range(52) if card % 4 != suit])
+      return decode(dealer.deal(2))
+    elif hand_type == 'pairs':
+      value = dealer.randint(13)
+      dealer.kill([card for card in range(52) if card // 4 != value])
+      return decode(dealer.deal(2))
+    elif hand_type == 'connected' or hand_type == 'connected_suited':
+      low = dealer.randint(12)
+      values = [low, low + 1]
+      if dealer.randint(2):
+        values.reverse()
+      first_suit = dealer.randint(4)
+      second_suit = first_suit if hand_type == 'connected_suited' else dealer.randint(4)
+      return decode([values[0] * 4 + first_suit, values[1] * 4 + second_suit])
+    else:
+      return 'Unknown hand type!'
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Lookup-table hand evaluator
+
+Cards are encoded as integers 0..51, `(value - 2) * 4 + suit`, which is the
+position of the card in `itertools.product(range(2, 15), SUITS)`. A hand of
+1 to 7 cards evaluates to a single integer strength: the category (1 = high
+card ... 9 = straight flush) in the top bits and up to five card values, one
+per nibble, below it. Larger strength means a better hand and equal strength
+means a split pot.
+"""
+
+import itertools
+import re
+
+SUITS = ['Spade', 'Heart', 'Diamond', 'Club']
+SUIT_LETTERS = ['S', 'H', 'D', 'C']
+
+VALUE_LABELS = {2: '2', 3: '3', 4: '4', 5: '5', 6: '6', 7: '7', 8: '8', 9: '9',
+                10: 'T', 11: 'J', 12: 'Q', 13: 'K', 14: 'A'}
+LABEL_VALUES = {label: value for value, label in VALUE_LABELS.items()}
+LABEL_VALUES['10'] = 10
+
+HAND_TYPES = [None, 'high card', 'one pair', 'two pairs', 'three of a kind', 'straight',
+              'flush', 'full house', 'four of a kind', 'straight flush']
+
+CATEGORY_SHIFT = 20
+
+# Bump whenever hand strengths change, so cached results are invalidated
+EVALUATOR_VERSION = 1
+
+# Card encoding
+# 11 = Jack, 12 = Queen, 13 = King, 14 = Ace
+CARD_CODES = {}
+for _value, _suit in itertools.product(range(2, 15), range(4)):
+    CARD_CODES[(_value, SUITS[_suit])] = (_value - 2) * 4 + _suit
+    CARD_CODES[(_value, SUIT_LETTERS[_suit])] = (_value - 2) * 4 + _suit
+
+def encode_card(card):
+    return CARD_CODES[tuple(card)]
+
+def encode(hand):
+    return [CARD_CODES[tuple(card)] for card in hand]
+
+# Parse cards written like 'AsKh', 'As Kh' or '10d 9c' into (value, suit) tuples
+def parse_cards(text):
+    cards = re.findall(r'(10|[2-9TJQKA])([SHDC])', text.upper())
+    if ''.join(value + suit for value, suit in cards) != re.sub(r'[\s,]', '', text.upper()):
+        raise ValueError('Cannot parse cards: ' + repr(text))
+    return [(LABEL_VALUES[value], SUITS[SUIT_LETTERS.index(suit)]) for value, suit in cards]
+
+def decode_card(code):
+    return (code // 4 + 2, SUITS[code % 4])
+
+def decode(codes):
+    return [decode_card(code) for code in codes]
+
+def hand_category(strength):
+    return strength >> CATEGORY_SHIFT
+
+# Card values that break ties within the category, most significant first
+def hand_kickers(strength):
+    values = []
+    for shift in range(CATEGORY_SHIFT - 4, -1, -4):
+        value = (strength >> shift) & 15
+        if value:
+            values.append(value)
+    return tuple(values)
+
+def describe(strength):
+    return (HAND_TYPES[hand_category(strength)], hand_kickers(strength))
+
+# Strength packing
+def make_strength(category, values):
+    strength = category
+    for i in range(5):
+        strength = (strength << 4) | (values[i] if i < len(values) else 0)
+    return strength
+
+# Straights as 13-bit rank masks (bit 0 = deuce), best first, wheel last
+STRAIGHTS = [(0b11111 << (top - 6), top) for top in range(14, 5, -1)]
+STRAIGHTS.append((0b1000000001111, 5))
+
+def straight_top(rank_mask):
+    for mask, top in STRAIGHTS:
+        if rank_mask & mask == mask:
+            return top
+    return 0
+
+def _rank_strength(counts):
+    # Best non-flush strength for value -> count
+    values = sorted(counts, reverse=True)
+    quads = [v for v in values if counts[v] == 4]
+    trips = [v for v in values if counts[v] == 3]
+    pairs = [v for v in values if counts[v] == 2]
+
+    if quads:
+        return make_strength(8, [quads[0]] + [v for v in values if v != quads[0]][:1])
+    if trips and (len(trips) > 1 or pairs):
+        return make_strength(7, [trips[0], max(trips[1:] + pairs)])
+
+    rank_mask = 0
+    for v in values:
+        rank_mask |= 1 << (v - 2)
+    top = straight_top(rank_mask)
+    if top:
+        return make_strength(5, [top])
+
+    if trips:
+        return make_strength(4, [trips[0]] + [v for v in values if v != trips[0]][:2])
+    if len(pairs) >= 2:
+        kickers = [v for v in values if v not in pairs[:2]][:1]
+        return make_strength(3, pairs[:2] + kickers)
+    if pairs:
+        return make_strength(2, [pairs[0]] + [v for v in values if v != pairs[0]][:3])
+    return make_strength(1, values[:5])
+
+def _flush_strength(rank_mask):
+    top = straight_top(rank_mask)
+    if top:
+        return make_strength(9, [top])
+    values = [v for v in range(14, 1, -1) if rank_mask & (1 << (v - 2))]
+    return make_strength(6, values[:5])
+
+# Per-card key: a base-5 digit per value (at most 4 of a value fit in one
+# digit) plus a 4-bit counter per suit. Suit counters start at 3 so that the
+# top bit of a counter is set exactly when that suit holds five or more cards.
+RANK_MASK = (1 << 32) - 1
+SUIT_SHIFT = 32
+SUIT_BIAS = sum(3 << (SUIT_SHIFT + 4 * s) for s in range(4))
+FLUSH_BITS = sum(8 << (SUIT_SHIFT + 4 * s) for s in range(4))
+FLUSH_SUIT = {8 << (SUIT_SHIFT + 4 * s): s for s in range(4)}
+
+CARD_KEYS = [5 ** (c // 4) + (1 << (SUIT_SHIFT + 4 * (c % 4))) for c in range(52)]
+RANK_BITS = [1 << (c // 4) for c in range(52)]
+
+# Lookup tables fill in each entry on first use, so importing the evaluator
+# stays cheap; build_tables() fills them completely up front.
+class _RankTable(dict):
+    def __missing__(self, key):
+        counts = {}
+        value = 2
+        rest = key
+        while rest:
+            rest, count = divmod(rest, 5)
+            if count:
+                counts[value] = count
+            value += 1
+        strength = self[key] = _rank_strength(counts)
+        return strength
+
+class _FlushTable(dict):
+    def __missing__(self, rank_mask):
+        strength = self[rank_mask] = _flush_strength(rank_mask)
+        return strength
+
+RANK_TABLE = _RankTable()
+FLUSH_TABLE = _FlushTable()
+
+def build_tables():
+    for size in range(1, 8):
+        for ranks in itertools.combinations_with_replacement(range(13), size):
+            if max(ranks.count(r) for r in ranks) <= 4:
+                RANK_TABLE[sum(5 ** r for r in ranks)]
+    for rank_mask in range(1 << 13):
+        if bin(rank_mask).count('1') >= 5:
+            FLUSH_TABLE[rank_mask]
+
+# Evaluate a hand of 1 to 7 encoded cards
+def evaluate(cards):
+    key = SUIT_BIAS + sum(map(CARD_KEYS.__getitem__, cards))
+    flush = key & FLUSH_BITS
+    if flush:
+        suit = FLUSH_SUIT[flush]
+        rank_mask = 0
+        for c in cards:
+            if c & 3 == suit:
+                rank_mask |= RANK_BITS[c]
+        return FLUSH_TABLE[rank_mask]
+    return RANK_TABLE[key & RANK_MASK]
+
+# Incremental evaluation. A board (or any cards every player shares) is
+# summarised once as its summed card key and the rank mask of each suit;
+# evaluate_hole then finishes one player's strength from just the hole
+# cards, giving the same result as evaluate(hole + board). Runouts, where the
+# board grows a card at a time, are enumerated in NumPy instead: see
+# poker.batch.card_counts, whose base counts play the role of the state.
+def board_state(cards):
+    key = SUIT_BIAS
+    suit_masks = [0, 0, 0, 0]
+    for c in cards:
+        key += CARD_KEYS[c]
+        suit_masks[c & 3] |= RANK_BITS[c]
+    return key, tuple(suit_masks)
+
+# Strength of two hole cards on top of a board state
+def evaluate_hole(state, hole):
+    key, suit_masks = state
+    first, second = hole
+    key += CARD_KEYS[first] + CARD_KEYS[second]
+    flush = key & FLUSH_BITS
+    if flush:
+        suit = FLUSH_SUIT[flush]
+        rank_mask = suit_masks[suit]
+        if first & 3 == suit:
+            rank_mask |= RANK_BITS[first]
+        if second & 3 == suit:
+            rank_mask |= RANK_BITS[second]
+        return FLUSH_TABLE[rank_mask]
+    return RANK_TABLE[key & RANK_MASK]
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Exact equity by enumeration
+
+When the unknown cards leave few enough possible deals, enumerating every
+one of them is both cheaper and more accurate than random sampling. Deals are
+generated lazily and evaluated in chunks, so memory stays flat even for the
+1.7M boards of a heads-up preflop matchup.
+
+Evaluation is incremental. The known board is counted once, alone and with
+each known hand, into base rank counts, suit counts and suit masks
+(poker.batch.card_counts); each chunk of runouts then adds only its own
+cards to those bases, as whole arrays. poker.spots samples runouts the same
+way.
+"""
+
+import itertools
+from math import comb
+
+import numpy as np
+
+from poker import instrument
+from poker.batch import card_counts, count_results, evaluate_batch
+from poker.evaluator import encode
+
+# Largest number of deals game() enumerates on its own instead of sampling.
+# This covers heads-up from the turn on (at most 45,540 deals), which costs
+# about as much as a 10,000 sim run; flop spots (1.07M deals) can opt in.
+EXACT_THRESHOLD = 100000
+
+CHUNK_SIZE = 100000
+
+# Number of deals exact enumeration visits for a given number of known
+# cards (hole cards and board), known board cards and random opponents
+def enumeration_size(num_known_cards, board_len, num_random_opponents=0):
+    remaining = 52 - num_known_cards
+    size = comb(remaining, 5 - board_len)
+    remaining -= 5 - board_len
+    for i in range(num_random_opponents):
+        size *= comb(remaining, 2)
+        remaining -= 2
+    return size
+
+def _deals(remaining, board_cards_needed, random_opponent):
+    for runout in itertools.combinations(remaining, board_cards_needed):
+        if random_opponent:
+            rest = [c for c in remaining if c not in runout]
+            for hole_cards in itertools.combinations(rest, 2):
+                yield runout + hole_cards
+        else:
+            yield runout
+
+# Exact (win, tie, loss) fractions for players_hand against the opponents'
+# hands, enumerating every way to complete the board. An opponent given as
+# None holds a random hand, which is enumerated too; at most one is allowed.
+def exact_equity(players_hand, opponents, board=None):
+    wins, ties, losses = exact_counts(players_hand, opponents, board)
+    total = wins + ties + losses
+    return wins / total, ties / total, losses / total
+
+def exact_counts(players_hand, opponents, board=None):
+    hero = np.array(encode(players_hand), dtype=np.int64)
+    known_board = np.array(encode(board or []), dtype=np.int64)
+    known_opponents = [encode(hand) for hand in opponents if hand is not None]
+    random_opponents = len(opponents) - len(known_opponents)
+    if random_opponents > 1:
+        raise ValueError('exact_equity enumerates at most one random opponent')
+
+    dead = set(hero) | set(known_board) | set(itertools.chain.from_iterable(known_opponents))
+    remaining = [c for c in range(52) if c not in dead]
+    board_cards_needed = 5 - len(known_board)
+    width = board_cards_needed + 2 * random_opponents
+
+    # The known board is counted once, alone and with each known hand; every
+    # deal then only adds its runout (and the random opponent's hole cards)
+    board_base = card_counts(known_board[None, :])
+    hero_base = card_counts(np.concatenate([known_board, hero])[None, :])
+    known_bases = [card_counts(np.concatenate([known_board, hand])[None, :]) for hand in known_opponents]
+
+    deals = _deals(remaining, board_cards_needed, random_opponents == 1)
+    wins = ties = losses = 0
+    clock = instrument.clock()
+    while True:
+        chunk = list(itertools.islice(deals, CHUNK_SIZE))
+        if not chunk:
+            break
+        cards = np.array(chunk, dtype=np.int64).reshape(len(chunk), width)
+        n_deals = len(chunk)
+        runouts = cards[:, :board_cards_needed]
+        clock.lap('deal')
+        players_strength = evaluate_batch(runouts, hero_base)
+        best_other = np.full(n_deals, -1, dtype=np.int64)
+        for base in known_bases:
+            best_other = np.maximum(best_other, evaluate_batch(runouts, base))
+        if random_opponents:
+            best_other = np.maximum(best_other, evaluate_batch(cards, board_base))
+        clock.lap('evaluate')
+        chunk_wins, chunk_ties, chunk_losses = count_results(players_strength, best_other)
+        wins += chunk_wins
+        ties += chunk_ties
+        losses += chunk_losses
+        clock.lap('aggregate')
+        instrument.count('sims', n_deals)
+        instrument.count('hand evaluations', n_deals * (len(opponents) + 1))
+    return wins, ties, losses
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Exact heads-up equity matrix
+
+Every preflop heads-up matchup of two combos, enumerated over all the boards
+the four hole cards leave (C(48, 5) = 1,712,304 each), stored as uint32 win
+and tie counts for all 1,326 x 1,326 combo pairs, plus the 169 x 169 class
+averages. Lookups are a row of the matrix, or its dot product with a Range's
+weights, so a heads-up preflop answer costs microseconds instead of a
+simulation. Set POKER_HEADSUP to the file's path (the CLI's --headsup does
+this) and game() answers heads-up preflop spots from it.
+
+    python -m poker.headsup headsup.bin --workers 8 --checkpoint-dir checkpoints
+
+builds the file. Work is split by the hero's class: its representative combo
+is played against one combo per orbit of villains under the suit
+permutations that fix the hero, and the other combos of both classes follow
+by permuting suits. Each finished class is saved to the checkpoint
+directory, so an interrupted build resumes after it. A full build takes
+about an hour of CPU time; the file is 14 MB and uses the poker.tables
+layout with its own magic, mapped read-only with np.memmap.
+
+Every board's strength for a given pair of hole cards comes from two lookups:
+a table of rank-only strengths by (board ranks, hole ranks), and, on the
+boards with three or more cards of one suit, the flush table.
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from math import comb
+
+import numpy as np
+
+from poker import instrument
+from poker.evaluator import RANK_TABLE, decode
+from poker.pockets import NUM_COMBOS, POCKET_COMBOS, POCKET_INDEX
+from poker.ranges import COMBO_CARDS, COMBO_MASKS, Range, combo_number
+from poker.starting_hands import HAND_CLASSES, class_representative
+from poker.sweep import _merge_stats, _run_instrumented
+from poker.tables import build_tables, load_tables, save_tables
+
+MAGIC = b'PKRHEADS'
+HEADSUP_ENV = 'POKER_HEADSUP'
+
+# Boards left by any two disjoint hands
+BOARDS_PER_MATCHUP = comb(48, 5)
+
+# Every permutation of the four suits as a map of card codes, and what it
+# does to each combo: SUIT_PERMUTATIONS[p, card], COMBO_PERMUTATIONS[p, combo]
+SUIT_PERMUTATIONS = np.array([[card & ~3 | suits[card & 3] for card in range(52)]
+                              for suits in itertools.permutations(range(4))])
+COMBO_PERMUTATIONS = POCKET_INDEX[SUIT_PERMUTATIONS[:, COMBO_CARDS[:, 0]], SUIT_PERMUTATIONS[:, COMBO_CARDS[:, 1]]]
+
+CLASS_COMBO_INDEX = [combo_number(class_representative(label)) for label in HAND_CLASSES]
+
+# Index into HAND_CLASSES of every combo, via the class of its orbit
+COMBO_CLASSES = np.empty(NUM_COMBOS, dtype=np.int64)
+for _class, _combo in enumerate(CLASS_COMBO_INDEX):
+    COMBO_CLASSES[COMBO_PERMUTATIONS[:, _combo]] = _class
+
+# Rank-only strength table column of two hole ranks, either order
+HOLE_RANKS = np.zeros((13, 13), dtype=np.int64)
+for _column, (_low, _high) in enumerate(itertools.combinations_with_replacement(range(13), 2)):
+    HOLE_RANKS[_low, _high] = HOLE_RANKS[_high, _low] = _column
+
+class _Boards:
+    # Every five-card board: its card mask, the row of its ranks in the
+    # rank-only table, and for boards with three or more cards of one suit
+    # that suit, how many cards it has and their rank mask
+    def __init__(self, masks, rank_rows, flushable, flush_suit, flush_count, flush_ranks):
+        self.masks = masks
+        self.rank_rows = rank_rows
+        self.flushable = flushable
+        self.flush_suit = flush_suit
+        self.flush_count = flush_count
+        self.flush_ranks = flush_ranks
+
+    # The boards that miss every card in `mask`
+    def without(self, mask):
+        keep = self.masks & mask == 0
+        positions = np.cumsum(keep) - 1
+        flush_keep = keep[self.flushable]
+        return _Boards(self.masks[keep], self.rank_rows[keep], positions[self.flushable[flush_keep]],
+                       self.flush_suit[flush_keep], self.flush_count[flush_keep], self.flush_ranks[flush_keep])
+
+@lru_cache(maxsize=1)
+def _strength_tables():
+    boards = np.array(list(itertools.combinations(range(52), 5)), dtype=np.int64)
+    ranks = boards >> 2
+    suits = boards & 3
+    rank_keys, rank_rows = np.unique((5 ** ranks).sum(axis=1), return_inverse=True)
+    hole_keys = [5 ** low + 5 ** high for low, high in itertools.combinations_with_replacement(range(13), 2)]
+    rank_strengths = np.array([[RANK_TABLE[int(key) + hole_key] for hole_key in hole_keys] for key in rank_keys],
+                              dtype=np.int32)
+
+    suit_counts = np.stack([(suits == s).sum(axis=1) for s in range(4)], axis=1)
+    flush_suit = suit_counts.argmax(axis=1)
+    flush_count = suit_counts.max(axis=1)
+    flushable = np.flatnonzero(flush_count >= 3)
+    in_suit = suits[flushable] == flush_suit[flushable, None]
+    flush_ranks = (in_suit << ranks[flushable]).sum(axis=1)
+    masks = (np.int64(1) << boards).sum(axis=1)
+    board_table = _Boards(masks, rank_rows.ravel(), flushable, flush_suit[flushable], flush_count[flushable],
+                          flush_ranks)
+    return board_table, rank_strengths, build_tables()['flush_strength'].astype(np.int32)
+
+# Strength of two hole cards with every board in `boards`; boards that share
+# a card with them get meaningless values
+def _strengths(hole, boards, rank_strengths, flush_strength):
+    a, b = (int(card) for card in hole)
+    strengths = rank_strengths[boards.rank_rows, HOLE_RANKS[a >> 2, b >> 2]]
+    a_suited = boards.flush_suit == a & 3
+    b_suited = boards.flush_suit == b & 3
+    flush = boards.flush_count + a_suited + b_suited >= 5
+    rows = boards.flushable[flush]
+    rank_mask = boards.flush_ranks[flush] | a_suited[flush] << (a >> 2) | b_suited[flush] << (b >> 2)
+    strengths[rows] = np.maximum(strengths[rows], flush_strength[rank_mask])
+    return strengths
+
+# Combo numbers of one villain per orbit under the suit permutations that fix
+# `hero`, and for every combo the representative of its orbit
+def villain_orbits(hero):
+    fixing = COMBO_PERMUTATIONS[COMBO_PERMUTATIONS[:, hero] == hero]
+    representatives = fixing.min(axis=0)
+    return np.unique(representatives), representatives
+
+# (2, 1326) uint32 win and tie counts of a class's representative combo
+# against every combo; combos that share a card with it get zeros
+def solve_class(label):
+    clock = instrument.clock()
+    boards, rank_strengths, flush_strength = _strength_tables()
+    hero = combo_number(class_representative(label))
+    boards = boards.without(COMBO_MASKS[hero])
+    hero_strengths = _strengths(COMBO_CARDS[hero], boards, rank_strengths, flush_strength)
+    clock.lap('hero')
+    orbit_villains, representatives = villain_orbits(hero)
+    counts = np.zeros((2, NUM_COMBOS), dtype=np.uint32)
+    for villain in orbit_villains:
+        if COMBO_MASKS[villain] & COMBO_MASKS[hero]:
+            continue
+        live = boards.masks & COMBO_MASKS[villain] == 0
+        villain_strengths = _strengths(COMBO_CARDS[villain], boards, rank_strengths, flush_strength)
+        counts[0, villain] = np.count_nonzero(live & (hero_strengths > villain_strengths))
+        counts[1, villain] = np.count_nonzero(live & (hero_strengths == villain_strengths))
+    clock.lap('matchups')
+    instrument.count('matchups', len(orbit_villains))
+    return counts[:, representatives]
+
+def _checkpoint_path(checkpoint_dir, label):
+    return os.path.join(checkpoint_dir, 'headsup_%s.npy' % label)
+
+def _save(counts, path):
+    temporary = '%s.%d.tmp.npy' % (path, os.getpid())
+    np.save(temporary, counts)
+    os.replace(temporary, path)
+
+# Full combo matrices from each class's counts: a combo of the class is the
+# representative under some suit permutation, and that permutation carries
+# the representative's row over to it
+def assemble(class_counts):
+    wins = np.zeros((NUM_COMBOS, NUM_COMBOS), dtype=np.uint32)
+    ties = np.zeros((NUM_COMBOS, NUM_COMBOS), dtype=np.uint32)
+    for label, counts in zip(HAND_CLASSES, class_counts):
+        hero = combo_number(class_representative(label))
+        for permutation in COMBO_PERMUTATIONS:
+            wins[permutation[hero], permutation] = counts[0]
+            ties[permutation[hero], permutation] = counts[1]
+    members = np.zeros((NUM_COMBOS, len(HAND_CLASSES)))
+    members[np.arange(NUM_COMBOS), COMBO_CLASSES] = 1
+    disjoint = (COMBO_MASKS[:, None] & COMBO_MASKS[None, :] == 0).astype(np.float64)
+    boards = members.T @ disjoint @ members * BOARDS_PER_MATCHUP
+    with np.errstate(invalid='ignore'):
+        class_win = members.T @ wins @ members / boards
+        class_tie = members.T @ ties @ members / boards
+    return {'wins': wins, 'ties': ties, 'class_win': class_win, 'class_tie': class_tie}
+
+# Solve every class, resuming from and adding to checkpoint_dir, and save
+# the matrix to `path`
+def build_matrix(path, workers=None, checkpoint_dir=None):
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    class_counts = {}
+    for label in HAND_CLASSES:
+        if checkpoint_dir and os.path.exists(_checkpoint_path(checkpoint_dir, label)):
+            class_counts[label] = np.load(_checkpoint_path(checkpoint_dir, label))
+    pending = [label for label in HAND_CLASSES if label not in class_counts]
+
+    workers = workers or os.cpu_count()
+    executor = None
+    if workers == 1 or len(pending) <= 1:
+        results = map(solve_class, pending)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        if instrument.active():
+            results = _merge_stats(executor.map(_run_instrumented, [(solve_class, label) for label in pending]))
+        else:
+            results = executor.map(solve_class, pending)
+    progress = instrument.progress(len(HAND_CLASSES), 'heads-up matrix', 'classes')
+    progress.update(len(class_counts))
+    try:
+        for label, counts in zip(pending, results):
+            class_counts[label] = counts
+            if checkpoint_dir:
+                _save(counts, _checkpoint_path(checkpoint_dir, label))
+            progress.update()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    save_tables(assemble([class_counts[label] for label in HAND_CLASSES]), path, MAGIC)
+
+class HeadsUpMatrix:
+    def __init__(self, arrays):
+        self.wins = arrays['wins']
+        self.ties = arrays['ties']
+        self.class_win = arrays['class_win']
+        self.class_tie = arrays['class_tie']
+
+    @classmethod
+    def load(cls, path):
+        return cls(load_tables(path, MAGIC))
+
+    # Exact (win, tie, loss) fractions of one hand against another
+    def equity(self, players_hand, opponents_hand):
+        hero = combo_number(players_hand)
+        villain = combo_number(opponents_hand)
+        if COMBO_MASKS[hero] & COMBO_MASKS[villain]:
+            raise ValueError('The two hands share a card')
+        win = int(self.wins[hero, villain]) / BOARDS_PER_MATCHUP
+        tie = int(self.ties[hero, villain]) / BOARDS_PER_MATCHUP
+        return win, tie, 1 - win - tie
+
+    # (win, tie, loss) of one class against another, over every pair of
+    # their combos that don't share a card
+    def class_equity(self, label, opponent_label):
+        i = HAND_CLASSES.index(label)
+        j = HAND_CLASSES.index(opponent_label)
+        win = float(self.class_win[i, j])
+        tie = float(self.class_tie[i, j])
+        return win, tie, 1 - win - tie
+
+    # (win, tie, loss) against a hand drawn from opponent_range (any two
+    # cards by default), weighted over the combos the hand leaves
+    def range_equity(self, players_hand, opponent_range=None):
+        hero = combo_number(players_hand)
+        live = COMBO_MASKS & COMBO_MASKS[hero] == 0
+        weights = live if opponent_range is None else np.where(live, opponent_range.weights, 0.0)
+        total = float(weights.sum()) * BOARDS_PER_MATCHUP
+        if not total > 0:
+            raise ValueError('Every combo in the range collides with the hand')
+        win = float(self.wins[hero] @ weights) / total
+        tie = float(self.ties[hero] @ weights) / total
+        return win, tie, 1 - win - tie
+
+@lru_cache(maxsize=None)
+def _load(path):
+    return HeadsUpMatrix.load(path)
+
+# The matrix mapped from the POKER_HEADSUP file, or None if it isn't set
+def headsup_matrix():
+    path = os.environ.get(HEADSUP_ENV)
+    if path:
+        return _load(path)
+    return None
+
+# Time to answer `queries` random lookups of each kind, in microseconds each
+def lookup_times(matrix, queries=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    hands = [decode(POCKET_COMBOS[i]) for i in rng.integers(NUM_COMBOS, size=queries)]
+    top = Range.top(0.15)
+    times = {}
+    for name, lookup in [('hand vs random', lambda hand: matrix.range_equity(hand)),
+                         ('hand vs 15% range', lambda hand: matrix.range_equity(hand, top))]:
+        start = time.perf_counter()
+        for hand in hands:
+            lookup(hand)
+        times[name] = (time.perf_counter() - start) / queries * 1e6
+    return times
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m poker.headsup', description='Build the exact heads-up equity matrix')
+    parser.add_argument('path', nargs='?', default='headsup.bin')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--checkpoint-dir', default='checkpoints')
+    parser.add_argument('--progress', action='store_true', help='print progress, throughput and ETA')
+    args = parser.parse_args(argv)
+    if args.progress:
+        instrument.enable(progress=True)
+    start = time.perf_counter()
+    build_matrix(args.path, args.workers, args.checkpoint_dir)
+    print('Built %s (%d kB) in %.0f s' % (args.path, os.path.getsize(args.path) // 1024, time.perf_counter() - start))
+    for name, micros in lookup_times(HeadsUpMatrix.load(args.path)).items():
+        print('%s: %.1f us per lookup' % (name, micros))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Hot-path instrumentation
+
+Off by default. enable() starts collecting the time spent in each phase of a
+simulation (dealing, evaluating, aggregating), counters such as simulations
+and hand evaluations, and, optionally, progress lines with throughput and ETA
+for long loops. While disabled, clock() hands out a shared clock whose laps do
+nothing and count() returns at once, so the hooks cost one call per batch or
+deal. Worker processes of a sweep collect their own Stats and send them back
+to be merged.
+"""
+
+import json
+import sys
+import time
+from collections import defaultdict
+
+class Stats:
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.started = time.perf_counter()
+
+    def snapshot(self):
+        return {'seconds': dict(self.seconds), 'counts': dict(self.counts)}
+
+    # Add a snapshot from another process
+    def merge(self, snapshot):
+        for phase, seconds in snapshot['seconds'].items():
+            self.seconds[phase] += seconds
+        for name, count in snapshot['counts'].items():
+            self.counts[name] += count
+
+    # Phase times are summed over every process that ran work, so with
+    # workers they can add up to more than the wall time
+    def summary(self):
+        wall = time.perf_counter() - self.started
+        return {'wall seconds': wall, 'phase seconds': dict(self.seconds), 'counts': dict(self.counts),
+                'per second': {name: count / wall for name, count in self.counts.items()}}
+
+class _Clock:
+    def __init__(self, stats):
+        self.stats = stats
+        self.last = time.perf_counter()
+
+    # Charge the time since the previous lap to `phase`
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.stats.seconds[phase] += now - self.last
+        self.last = now
+
+class _NullClock:
+    def lap(self, phase):
+        pass
+
+NULL_CLOCK = _NullClock()
+
+_stats = None
+_progress = False
+
+def enable(progress=False):
+    global _stats, _progress
+    _stats = Stats()
+    _progress = progress
+    return _stats
+
+# Stop collecting; returns what was collected
+def disable():
+    global _stats, _progress
+    stats, _stats, _progress = _stats, None, False
+    return stats
+
+def active():
+    return _stats
+
+def clock():
+    return NULL_CLOCK if _stats is None else _Clock(_stats)
+
+def count(name, n=1):
+    if _stats is not None:
+        _stats.counts[name] += n
+
+def merge(snapshot):
+    if _stats is not None:
+        _stats.merge(snapshot)
+
+def write_summary(path):
+    with open(path, 'w') as f:
+        json.dump(_stats.summary(), f, indent=2)
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '%d:%02d:%02d' % (hours, minutes, seconds)
+
+class Progress:
+    # Prints at most one line every `interval` seconds, and one at the end
+    def __init__(self, total, label, unit, interval=5.0, stream=None):
+        self.total = total
+        self.label = label
+        self.unit = unit
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.started = self.printed = time.perf_counter()
+
+    def update(self, n=1):
+        self.done += n
+        now = time.perf_counter()
+        if now - self.printed >= self.interval or self.done >= self.total:
+            self.printed = now
+            elapsed = now - self.started
+            rate = self.done / elapsed if elapsed else 0.0
+            eta = (self.total - self.done) / rate if rate else 0.0
+            line = '%s: %d/%d %s (%.1f%%), %.2f %s/s, elapsed %s, ETA %s' % (
+                self.label, self.done, self.total, self.unit, 100 * self.done / max(self.total, 1), rate,
+                self.unit, _duration(elapsed), _duration(eta))
+            if _stats is not None and _stats.counts.get('sims'):
+                line += ', %.0f sims/s' % (_stats.counts['sims'] / (now - _stats.started))
+            print(line, file=self.stream, flush=True)
+
+class _NullProgress:
+    def update(self, n=1):
+        pass
+
+NULL_PROGRESS = _NullProgress()
+
+# Progress reporting for a loop of `total` steps, if enabled
+def progress(total, label, unit='items'):
+    return Progress(total, label, unit) if _progress else NULL_PROGRESS
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Per-deal outcome logs
+
+An OutcomeLog keeps every simulated deal instead of only the totals: each
+player's hole cards (seat 0 is the hero), the board, each player's strength
+and the hero's result, as one fixed-width record of a structured dtype. For
+nine players a record is 60 bytes, so a billion deals take 60 GB; heads-up
+ones take 18.
+
+Records are buffered and written as .npy chunks of chunk_records deals in a
+directory, each chunk complete before it is renamed into place. Reopening a
+log appends new chunks after the old ones; clear() empties it first. Readers map the chunks read-only
+with np.memmap and reduce them one at a time with NumPy, so a scan runs at
+disk speed in constant memory:
+
+    game(hand, 3, 1000000, 0, outcomes=OutcomeLog('log', 4))
+    category_results('log')   # hero's final category x win / tie / loss
+
+    python -m poker.outcomes log
+
+prints those tables and the scan rate. Folded opponents are logged with
+strength 0. Only the batched engine records outcomes.
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from poker.evaluator import CATEGORY_SHIFT, HAND_TYPES
+
+# Hero's result codes, in the order of the (wins, ties, losses) tuples
+RESULTS = ['win', 'tie', 'loss']
+
+CHUNK_RECORDS = 1 << 20
+
+def record_dtype(num_players):
+    return np.dtype([('hands', 'u1', (num_players, 2)), ('board', 'u1', (5,)),
+                     ('strengths', '<u4', (num_players,)), ('result', 'u1')])
+
+# Result code of the hero's strength against the best other strength
+def result_codes(players_strength, best_other):
+    return (1 + np.sign(best_other - players_strength)).astype(np.uint8)
+
+def _chunk_paths(path):
+    return sorted(glob.glob(os.path.join(path, 'chunk_*.npy')))
+
+class OutcomeLog:
+    def __init__(self, path, num_players, chunk_records=CHUNK_RECORDS):
+        self.path = path
+        self.dtype = record_dtype(num_players)
+        os.makedirs(path, exist_ok=True)
+        existing = _chunk_paths(path)
+        if existing and np.load(existing[0], mmap_mode='r').dtype != self.dtype:
+            raise ValueError('%s holds outcomes of a different number of players' % path)
+        self.chunks = len(existing)
+        self.buffer = np.zeros(chunk_records, dtype=self.dtype)
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Log a batch of deals: hands (N, players, 2) with the hero in seat 0,
+    # boards (N, 5), strengths (N, players) and the hero's result codes (N,)
+    def append(self, hands, boards, strengths, results):
+        strengths = np.maximum(strengths, 0)
+        start = 0
+        while start < len(hands):
+            count = min(len(hands) - start, len(self.buffer) - self.size)
+            rows = self.buffer[self.size:self.size + count]
+            rows['hands'] = hands[start:start + count]
+            rows['board'] = boards[start:start + count]
+            rows['strengths'] = strengths[start:start + count]
+            rows['result'] = results[start:start + count]
+            self.size += count
+            start += count
+            if self.size == len(self.buffer):
+                self.flush()
+
+    # Write the buffered deals as the next chunk
+    def flush(self):
+        if not self.size:
+            return
+        path = os.path.join(self.path, 'chunk_%06d.npy' % self.chunks)
+        temporary = '%s.%d.tmp.npy' % (path, os.getpid())
+        np.save(temporary, self.buffer[:self.size])
+        os.replace(temporary, path)
+        self.chunks += 1
+        self.size = 0
+
+    def close(self):
+        self.flush()
+
+    # Drop every logged deal, buffered or written
+    def clear(self):
+        for chunk_path in _chunk_paths(self.path):
+            os.remove(chunk_path)
+        self.chunks = 0
+        self.size = 0
+
+# Every chunk of the log at `path`, mapped read-only, in order
+def read_chunks(path):
+    for chunk_path in _chunk_paths(path):
+        yield np.load(chunk_path, mmap_mode='r')
+
+# Sum of function(chunk) over the chunks of a log
+def aggregate(path, function):
+    total = None
+    for chunk in read_chunks(path):
+        value = function(chunk)
+        total = value if total is None else total + value
+    return total
+
+def record_count(path):
+    return aggregate(path, len) or 0
+
+# The hero's (wins, ties, losses)
+def result_counts(path):
+    return aggregate(path, lambda chunk: np.bincount(chunk['result'], minlength=len(RESULTS)))
+
+# (len(HAND_TYPES), 3) counts of the hero's final category against the result,
+# e.g. [HAND_TYPES.index('flush'), 2] deals the hero lost holding a flush
+def category_results(path):
+    def counts(chunk):
+        categories = chunk['strengths'][:, 0] >> CATEGORY_SHIFT
+        cells = categories.astype(np.int64) * len(RESULTS) + chunk['result']
+        return np.bincount(cells, minlength=len(HAND_TYPES) * len(RESULTS))
+    return aggregate(path, counts).reshape(len(HAND_TYPES), len(RESULTS))
+
+# Deals won by each category, indexed like HAND_TYPES
+def winning_categories(path):
+    return aggregate(path, lambda chunk: np.bincount(chunk['strengths'].max(axis=1) >> CATEGORY_SHIFT,
+                                                     minlength=len(HAND_TYPES)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m poker.outcomes', description='Summarise an outcome log')
+    parser.add_argument('path')
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    table = category_results(args.path)
+    seconds = time.perf_counter() - start
+    total = int(table.sum())
+    size = sum(os.path.getsize(chunk_path) for chunk_path in _chunk_paths(args.path))
+    print('%d deals, %d MB, scanned in %.2f s (%.0f deals/s, %.0f MB/s)' % (
+        total, size >> 20, seconds, total / seconds, size / seconds / 2 ** 20))
+    print('%-16s' % 'hero holds' + ''.join('%10s' % result for result in RESULTS))
+    for category in range(1, len(HAND_TYPES)):
+        print('%-16s' % HAND_TYPES[category] + ''.join('%10d' % count for count in table[category]))
+    print('%-16s' % 'winning hand' + '%10s' % 'deals')
+    for category, count in enumerate(winning_categories(args.path).tolist()):
+        if HAND_TYPES[category]:
+            print('%-16s%10d' % (HAND_TYPES[category], count))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Pocket-card combos
+
+The 1,326 two-card combos are numbered 0..1325 in the order of the pocket
+frequency table: cards ordered by value and then suit letter (C, D, H, S),
+combos in itertools.combinations order, '2C/2D', '2C/2H', ..., '14H/14S'.
+POCKET_INDEX maps two encoded cards straight to their combo's number, so
+counting dealt hands is an np.bincount and labels are only built for output.
+"""
+
+import itertools
+
+import numpy as np
+
+from poker import instrument
+from poker.dealing import deal_batch, default_rng
+from poker.evaluator import SUIT_LETTERS, decode_card
+
+NUM_COMBOS = 1326
+
+# Position of an encoded card in the table's card order. Encoded suits run
+# S, H, D, C, so reversing them within each value is an XOR with 3.
+def table_position(card):
+    return card ^ 3
+
+# Combinadic number of the positions p < q among 52 cards
+def combo_number(p, q):
+    return p * (103 - p) // 2 + q - p - 1
+
+def _build_pocket_index():
+    positions = table_position(np.arange(52))
+    low = np.minimum.outer(positions, positions)
+    high = np.maximum.outer(positions, positions)
+    index = combo_number(low, high)
+    index[np.arange(52), np.arange(52)] = -1
+    return index
+
+# POCKET_INDEX[a, b] is the combo number of encoded cards a and b, in either
+# order; -1 on the diagonal
+POCKET_INDEX = _build_pocket_index()
+
+# Encoded cards of each combo, in table order
+POCKET_COMBOS = [tuple(position ^ 3 for position in pair) for pair in itertools.combinations(range(52), 2)]
+
+def _card_label(card):
+    return str(card // 4 + 2) + SUIT_LETTERS[card % 4]
+
+POCKET_LABELS = [_card_label(a) + '/' + _card_label(b) for a, b in POCKET_COMBOS]
+
+# Combos as [(value, suit), (value, suit)] lists
+def pocket_cards(index):
+    return [decode_card(card) for card in POCKET_COMBOS[index]]
+
+# Deal n_games rounds of hole cards to num_of_players and count how often each
+# combo was dealt, as a length-1326 array in table order
+def pocket_counts_batch(num_of_players, n_games, rng=None):
+    rng = default_rng(rng)
+    clock = instrument.clock()
+    dealt = deal_batch(np.arange(52), n_games, 2 * num_of_players, rng)
+    clock.lap('deal')
+    combos = POCKET_INDEX[dealt[:, 0::2], dealt[:, 1::2]]
+    counts = np.bincount(combos.ravel(), minlength=NUM_COMBOS)
+    clock.lap('aggregate')
+    instrument.count('sims', n_games)
+    return counts
+
+def simulate_pocket_counts(num_of_players, game_sims, batch_size=10000, rng=None):
+    rng = default_rng(rng)
+    counts = np.zeros(NUM_COMBOS, dtype=np.int64)
+    for start in range(0, game_sims, batch_size):
+        counts += pocket_counts_batch(num_of_players, min(batch_size, game_sims - start), rng)
+    return counts
+
+# Every player's hand is a uniformly random combo, so each combo is expected
+# game_sims * num_of_players / 1326 times
+def expected_pocket_count(num_of_players, game_sims):
+    return game_sims * num_of_players / NUM_COMBOS
+
+# Pearson chi-square statistic of observed combo counts against that
+# expectation; it has 1325 degrees of freedom, so a fair deal scores about
+# 1325 +/- 51
+def pocket_chi_square(counts, num_of_players, game_sims):
+    expected = expected_pocket_count(num_of_players, game_sims)
+    return float(((np.asarray(counts) - expected) ** 2 / expected).sum())
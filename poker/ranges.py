@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Opponent hand ranges
+
+A Range weights each of the 1,326 two-card combos, numbered as in
+poker.pockets. Ranged opponents are dealt jointly: the tuple of their hands
+is drawn with probability proportional to the product of its weights among
+the tuples that share no card with each other or the known cards, so no
+seat's distribution depends on its position. Opponents without a range and
+the rest of the board then come uniformly from the cards left.
+
+When the ranges leave at most JOINT_TABLE_LIMIT such tuples they are
+enumerated and drawn from exactly. Otherwise each seat draws from its alias
+table in O(1) and tuples that collide are redrawn whole, which is exact too.
+Rows still colliding after JOINT_REJECTION_ROUNDS, where card removal makes
+whole tuples rare (tight ranges at a full table), start from seats drawn one
+at a time from the combos left and are then Gibbs-sampled: each seat is
+redrawn GIBBS_SWEEPS times from its range given every other card out, which
+brings them to the joint distribution up to a negligible mixing error. A
+deal fails only if no seat order finds any tuple at all.
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from poker.dealing import deal_batch_excluding
+from poker.evaluator import encode, parse_cards
+from poker.pockets import NUM_COMBOS, POCKET_COMBOS, POCKET_INDEX
+from poker.starting_hands import CLASS_COMBOS, CLASS_RANKING, HAND_CLASSES, class_combos
+
+# Encoded cards and 52-bit card masks of each combo
+COMBO_CARDS = np.array(POCKET_COMBOS, dtype=np.int64)
+COMBO_MASKS = (1 << COMBO_CARDS[:, 0]) | (1 << COMBO_CARDS[:, 1])
+
+# Largest number of joint hand tuples enumerated for ranged opponents, the
+# whole-tuple redraws tried when there are more, and the Gibbs fallback's
+# attempts at a starting tuple and sweeps over the seats
+JOINT_TABLE_LIMIT = 200000
+JOINT_REJECTION_ROUNDS = 20
+GIBBS_STARTS = 100
+GIBBS_SWEEPS = 10
+
+# Rows per conditional draw, bounding its (rows, combos) arrays
+CONDITIONAL_CHUNK = 2048
+
+def card_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= 1 << card
+    return mask
+
+def combo_number(hand):
+    first, second = encode(hand)
+    return int(POCKET_INDEX[first, second])
+
+# Vose's alias method: entry i is kept with probability prob[i] and replaced
+# by alias[i] otherwise
+def _alias_table(probabilities):
+    n = len(probabilities)
+    scaled = (probabilities * n).tolist()
+    prob = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1]
+    large = [i for i in range(n) if scaled[i] >= 1]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        prob[less] = scaled[less]
+        alias[less] = more
+        scaled[more] += scaled[less] - 1
+        (small if scaled[more] < 1 else large).append(more)
+    # Whatever is left over is 1 up to rounding and keeps prob 1
+    return prob, alias
+
+class Range:
+    # weights: one non-negative weight per combo, in poker.pockets order
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (NUM_COMBOS,):
+            raise ValueError('A Range needs %d combo weights, got shape %s' % (NUM_COMBOS, weights.shape))
+        if (weights < 0).any() or not weights.sum() > 0:
+            raise ValueError('Range weights must be non-negative and not all zero')
+        self.weights = weights
+        # The alias table only covers combos in the range
+        self.combos = np.flatnonzero(weights)
+        support = weights[self.combos]
+        self.prob, alias = _alias_table(support / support.sum())
+        self.alias = self.combos[alias]
+
+    @classmethod
+    def uniform(cls):
+        return cls(np.ones(NUM_COMBOS))
+
+    # {class label: weight}, or an iterable of labels weighted 1
+    @classmethod
+    def from_classes(cls, classes):
+        if not isinstance(classes, dict):
+            classes = dict.fromkeys(classes, 1.0)
+        weights = np.zeros(NUM_COMBOS)
+        for label, weight in classes.items():
+            for hand in class_combos(label):
+                weights[combo_number(hand)] = weight
+        return cls(weights)
+
+    # The strongest classes by CLASS_RANKING, adding whole classes until
+    # they hold at least `fraction` of all combos
+    @classmethod
+    def top(cls, fraction):
+        labels = []
+        combos = 0
+        for label in CLASS_RANKING:
+            if combos >= fraction * NUM_COMBOS:
+                break
+            labels.append(label)
+            combos += CLASS_COMBOS[label]
+        return cls.from_classes(labels)
+
+    # Ranges written like 'QQ+ AKs AKo:0.5 JTs AsKs' or '15%': class labels
+    # ('AK' means suited and offsuit, a trailing + adds every better class
+    # of the same kind), exact combos, optional ':weight' suffixes, or the
+    # top percentage of hands
+    @classmethod
+    def parse(cls, text):
+        text = text.strip()
+        if text.endswith('%'):
+            return cls.top(float(text[:-1]) / 100)
+        weights = np.zeros(NUM_COMBOS)
+        for token in re.split(r'[\s,]+', text):
+            if not token:
+                continue
+            token, _, weight = token.partition(':')
+            weight = float(weight) if weight else 1.0
+            labels = _expand_label(token)
+            if labels:
+                for label in labels:
+                    for hand in class_combos(label):
+                        weights[combo_number(hand)] = weight
+            else:
+                weights[combo_number(parse_cards(token))] = weight
+        return cls(weights)
+
+    # Number of combos with a positive weight
+    def size(self):
+        return len(self.combos)
+
+    def _draw(self, n, rng):
+        i = (rng.random(n) * len(self.combos)).astype(np.intp)
+        return np.where(rng.random(n) < self.prob[i], self.combos[i], self.alias[i])
+
+# Class labels a range token stands for, or None if it isn't a class
+def _expand_label(token):
+    match = re.fullmatch(r'([2-9TJQKA])([2-9TJQKA])([so]?)(\+?)', token, re.IGNORECASE)
+    if not match:
+        return None
+    high, low, kind, plus = match.groups()
+    high, low, kind = high.upper(), low.upper(), kind.lower()
+    if high == low:
+        labels = [high + low]
+        if plus:
+            labels = [label for label in HAND_CLASSES if len(label) == 2 and
+                      HAND_CLASSES.index(label) <= HAND_CLASSES.index(high + low)]
+        return labels
+    kinds = [kind] if kind else ['s', 'o']
+    labels = []
+    for kind in kinds:
+        label = high + low + kind
+        if label not in CLASS_COMBOS:
+            return None
+        labels.append(label)
+        if plus:
+            # Same high card, better kickers: A9s+ is A9s, ATs, ..., AKs
+            labels.extend(other for other in HAND_CLASSES if other[0] == high and other[2:] == kind and
+                          HAND_CLASSES.index(other) < HAND_CLASSES.index(label))
+    return labels
+
+# One Range or None per opponent from a Range shared by all opponents or a
+# list of them; None when every opponent is uniformly random
+def opponent_ranges(ranges, num_other_players):
+    if ranges is None:
+        return None
+    if isinstance(ranges, Range):
+        ranges = [ranges] * num_other_players
+    ranges = list(ranges)
+    if len(ranges) != num_other_players:
+        raise ValueError('Got %d ranges for %d opponents' % (len(ranges), num_other_players))
+    if all(r is None for r in ranges):
+        return None
+    return ranges
+
+# Every tuple of combos, one per range, that shares no card with each other
+# or dead_mask, with the cumulative product of their weights; None if there
+# are more than JOINT_TABLE_LIMIT
+@lru_cache(maxsize=64)
+def _joint_table(dead_mask, ranges):
+    tuples = np.zeros((1, 0), dtype=np.int64)
+    masks = np.array([dead_mask], dtype=np.int64)
+    weights = np.ones(1)
+    for r in ranges:
+        combos = r.combos[COMBO_MASKS[r.combos] & dead_mask == 0]
+        if len(tuples) * len(combos) > JOINT_TABLE_LIMIT:
+            return None
+        rows = np.repeat(np.arange(len(tuples)), len(combos))
+        columns = np.tile(combos, len(tuples))
+        live = masks[rows] & COMBO_MASKS[columns] == 0
+        rows, columns = rows[live], columns[live]
+        tuples = np.column_stack([tuples[rows], columns])
+        masks = masks[rows] | COMBO_MASKS[columns]
+        weights = weights[rows] * r.weights[columns]
+    if not len(tuples):
+        raise ValueError('Every combination of the ranges collides with cards already dealt')
+    return tuples, weights.cumsum()
+
+# (n_games, len(ranges)) combos drawn jointly for ranged opponents, none of
+# them touching dead_mask or each other
+def sample_joint(dead_mask, ranges, n_games, rng):
+    ranges = tuple(ranges)
+    table = _joint_table(int(dead_mask), ranges)
+    if table is not None:
+        tuples, cumulative = table
+        picks = np.searchsorted(cumulative, rng.random(n_games) * cumulative[-1], side='right')
+        return tuples[np.minimum(picks, len(tuples) - 1)]
+    combos = np.empty((n_games, len(ranges)), dtype=np.int64)
+    rows = np.arange(n_games)
+    for i in range(JOINT_REJECTION_ROUNDS):
+        used = np.full(len(rows), dead_mask, dtype=np.int64)
+        clash = np.zeros(len(rows), dtype=bool)
+        for seat, r in enumerate(ranges):
+            drawn = r._draw(len(rows), rng)
+            combos[rows, seat] = drawn
+            clash |= COMBO_MASKS[drawn] & used != 0
+            used |= COMBO_MASKS[drawn]
+        rows = rows[clash]
+        if not len(rows):
+            return combos
+    combos[rows] = _gibbs(dead_mask, ranges, len(rows), rng)
+    return combos
+
+# One combo per row from the range's combos that miss the row's `used` cards,
+# in proportion to their weights; -1 where none is left
+def _draw_live(r, used, rng):
+    drawn = np.empty(len(used), dtype=np.int64)
+    for start in range(0, len(used), CONDITIONAL_CHUNK):
+        chunk = used[start:start + CONDITIONAL_CHUNK]
+        live = COMBO_MASKS[r.combos] & chunk[:, None] == 0
+        cumulative = np.where(live, r.weights[r.combos], 0.0).cumsum(axis=1)
+        totals = cumulative[:, -1]
+        picks = (cumulative <= rng.random(len(chunk))[:, None] * totals[:, None]).sum(axis=1)
+        drawn[start:start + CONDITIONAL_CHUNK] = np.where(totals > 0, r.combos[np.minimum(picks, len(r.combos) - 1)],
+                                                          -1)
+    return drawn
+
+# n_games tuples for ranges whose whole tuples rarely miss each other. Each
+# row starts from seats drawn one at a time, in its own random order, from
+# the combos the earlier ones leave (retrying rows that run out), then every
+# seat is redrawn GIBBS_SWEEPS times given all the others, again in a random
+# order per row. Random orders keep every seat's marginal the same.
+def _gibbs(dead_mask, ranges, n_games, rng):
+    combos = np.empty((n_games, len(ranges)), dtype=np.int64)
+    rows = np.arange(n_games)
+    for i in range(GIBBS_STARTS):
+        used = np.full(len(rows), dead_mask, dtype=np.int64)
+        stuck = np.zeros(len(rows), dtype=bool)
+        orders = np.argsort(rng.random((len(rows), len(ranges))), axis=1)
+        for step in range(len(ranges)):
+            for seat, r in enumerate(ranges):
+                turn = np.flatnonzero(orders[:, step] == seat)
+                drawn = _draw_live(r, used[turn], rng)
+                stuck[turn] |= drawn < 0
+                combos[rows[turn], seat] = drawn
+                used[turn] |= np.where(drawn < 0, 0, COMBO_MASKS[drawn])
+        rows = rows[stuck]
+        if not len(rows):
+            break
+    else:
+        raise ValueError('Every combination of the ranges collides with cards already dealt')
+    masks = COMBO_MASKS[combos]
+    for sweep in range(GIBBS_SWEEPS):
+        orders = np.argsort(rng.random((n_games, len(ranges))), axis=1)
+        for step in range(len(ranges)):
+            for seat, r in enumerate(ranges):
+                turn = np.flatnonzero(orders[:, step] == seat)
+                # The row's current combo is always live, so a draw always exists
+                others = np.bitwise_or.reduce(np.delete(masks[turn], seat, axis=1), axis=1) | dead_mask
+                combos[turn, seat] = _draw_live(r, others, rng)
+                masks[turn, seat] = COMBO_MASKS[combos[turn, seat]]
+    return combos
+
+# Hole cards for every opponent, (n_games, k, 2), and board_cards more cards
+# per deal, (n_games, board_cards), none of them in `dead` (encoded cards).
+# ranges holds one Range or None per opponent.
+def deal_ranged(dead, ranges, n_games, board_cards, rng):
+    dead = [int(card) for card in dead]
+    others = np.empty((n_games, len(ranges), 2), dtype=np.int64)
+    ranged_seats = [i for i, r in enumerate(ranges) if r is not None]
+    random_seats = [i for i, r in enumerate(ranges) if r is None]
+    combos = sample_joint(card_mask(dead), [ranges[i] for i in ranged_seats], n_games, rng)
+    others[:, ranged_seats] = COMBO_CARDS[combos]
+    used = card_mask(dead) | np.bitwise_or.reduce(COMBO_MASKS[combos], axis=1)
+
+    # Deal enough extra cards to cover the ranged hands and drop the ones they hold
+    count = 2 * len(random_seats) + board_cards
+    available = np.setdiff1d(np.arange(52), dead)
+    dealt = deal_batch_excluding(available, used, count, 2 * len(ranged_seats), rng)
+    others[:, random_seats] = dealt[:, :2 * len(random_seats)].reshape(n_games, len(random_seats), 2)
+    return others, dealt[:, 2 * len(random_seats):]
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Reference hand rankings
+
+The original check_* / get_* functions. Showdowns use poker.evaluator; these
+are kept as the straightforward implementation to check it against.
+"""
+
+import itertools
+from collections import defaultdict
+
+# Functions to check winning hands
+# modified from: https://briancaffey.github.io/2018/01/02/checking-poker-hands-with-python.html
+
+def check_straight_flush(hand):
+    if check_flush(hand):
+        hand = get_flush(hand)
+        if check_straight(hand) and len(hand) >= 5:
+          return True
+        else:
+          return False
+    else:
+        return False
+
+def check_four_of_a_kind(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values: 
+        value_counts[v]+=1
+    if 4 in sorted(value_counts.values()):
+        return True
+    return False
+
+def get_quads(hand):
+  values = [i[0] for i in hand]
+  value_counts = defaultdict(lambda:0)
+  for v in values: 
+      value_counts[v]+=1
+  return sorted([k for k,v in value_counts.items() if v==4], reverse=True)
+
+def check_full_house(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values: 
+        value_counts[v]+=1
+    sorted_value_counts = sorted(value_counts.values())
+    if 3 in sorted_value_counts:
+      if sorted_value_counts.count(3) > 1:
+        return True
+      elif 2 in sorted_value_counts:
+        return True
+    return False
+  
+def get_full_house(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values: 
+        value_counts[v]+=1
+    sorted_value_counts = sorted(value_counts.values())
+    return sorted([k for k,v in value_counts.items() if v==3 or v==2], reverse=True)
+
+def check_flush(hand):
+    suits = [i[1] for i in hand]
+    suit_counts = defaultdict(lambda:0)
+    for suit in suits: 
+        suit_counts[suit]+=1
+    if sorted(suit_counts.values(), reverse=True)[0] >= 5:
+        return True
+    else:
+        return False
+
+def get_flush(hand):
+    suits = [i[1] for i in hand]
+    suit_counts = defaultdict(lambda:0)
+    for suit in suits: 
+        suit_counts[suit]+=1
+    top_suit_count = sorted(suit_counts.values(), reverse=True)[0]
+    top_suit = sorted([k for k,v in suit_counts.items() if v==top_suit_count], reverse=True)[0]
+    flush_cards = []
+    for card in hand:
+      if card[1] == top_suit:
+        flush_cards.append(card)
+    return flush_cards
+      
+def five_consecutive_cards(number_set):
+  if len(number_set) < 5:
+    return False
+  
+  for w, z in itertools.groupby(number_set, lambda x, y=itertools.count(): next(y)-x):
+    grouped = list(z)
+    if len(grouped) >= 5:
+      return True
+  return False
+
+def get_highest_consecutive_card(number_set):
+  for w, z in itertools.groupby(number_set, lambda x, y=itertools.count(): next(y)-x):
+    grouped = list(z)
+    if len(grouped) >= 5:
+      return sorted(grouped, reverse=True)[0]
+
+def check_straight(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values:
+        value_counts[v] += 1
+
+    set_of_values = set(values)    
+    if five_consecutive_cards(set_of_values):
+        return True
+    else: 
+        # Check straight with low Ace
+        low_straight = set([14, 2, 3, 4, 5])
+        if low_straight.issubset(set_of_values):
+            return True
+        return False
+    
+      
+def get_straight_top_card(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values:
+        value_counts[v] += 1
+
+    set_of_values = set(values)    
+    if five_consecutive_cards(set_of_values):
+        return get_highest_consecutive_card(set_of_values)
+    else: 
+        # Straight with low Ace, 5 card is high
+        return 5
+
+def check_three_of_a_kind(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values: 
+        value_counts[v]+=1
+    if 3 in sorted(value_counts.values()):
+        return True
+    else:
+        return False
+      
+def get_triples(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values: 
+        value_counts[v]+=1
+    return sorted([k for k,v in value_counts.items() if v==3], reverse=True)
+
+def check_two_pairs(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values:
+        value_counts[v]+=1
+    if sorted(value_counts.values()).count(2) >= 2:
+        return True
+    else:
+        return False
+
+def check_one_pairs(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values:
+        value_counts[v]+=1      
+    if 2 in value_counts.values():
+        return True
+    else:
+        return False
+      
+def get_pairs(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values:
+        value_counts[v]+=1
+    return sorted([k for k,v in value_counts.items() if v == 2], reverse=True)
+
+# Full ranking of a hand of 5 to 7 cards, built only from the functions
+# above: the best (category, tie-break values) tuple over every five-card
+# subset. Slow, but independent of the table evaluator, so faster evaluators
+# can be checked against it.
+def five_card_rank(hand):
+    values = [i[0] for i in hand]
+    value_counts = defaultdict(lambda:0)
+    for v in values:
+        value_counts[v]+=1
+    # Values by how often they appear, then by value: (8, 8, 8, 5, 5) -> [8, 5]
+    grouped = sorted(value_counts, key=lambda v: (value_counts[v], v), reverse=True)
+
+    if check_straight(hand):
+        straight = (get_straight_top_card(hand),)
+        if check_flush(hand):
+            return (9,) + straight
+        return (5,) + straight
+    if check_four_of_a_kind(hand):
+        return (8,) + tuple(grouped)
+    if check_full_house(hand):
+        return (7,) + tuple(grouped)
+    if check_flush(hand):
+        return (6,) + tuple(sorted(values, reverse=True))
+    if check_three_of_a_kind(hand):
+        return (4,) + tuple(grouped)
+    if check_two_pairs(hand):
+        return (3,) + tuple(grouped)
+    if check_one_pairs(hand):
+        return (2,) + tuple(grouped)
+    return (1,) + tuple(grouped)
+
+def reference_rank(hand):
+    return max(five_card_rank(list(five)) for five in itertools.combinations(hand, 5))
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Analysis tables
+
+The notebook's three analyses as functions returning DataFrames: win
+percentages of every pocket hand, which hand categories win showdowns, and
+how often each pocket hand is dealt. Rows are streamed to checkpoints under
+checkpoint_dir, named after the run's parameters, so an interrupted run
+resumes where it stopped. pandas is only imported here.
+"""
+
+import itertools
+import os
+
+import numpy as np
+
+from poker import instrument
+from poker.attribution import attribute_seats
+from poker.batch import simulate_winning_categories
+from poker.cache import EquityCache
+from poker.dealing import Dealer
+from poker.evaluator import HAND_TYPES
+from poker.outcomes import OutcomeLog
+from poker.pockets import NUM_COMBOS, POCKET_LABELS, pocket_cards, simulate_pocket_counts
+from poker.results import ResultsWriter
+from poker.simulation import holdem_pocket_cards_simulation, holdem_simulation_winning_hand
+from poker.starting_hands import CLASS_COMBOS, HAND_CLASSES, hand_class, is_connected, is_pocket_pair, is_suited
+from poker.sweep import iter_sweep_hand_classes
+
+WIN_TYPES = ['straight flush', 'four of a kind', 'full house', 'flush', 'straight', 'three of a kind', 'two pairs',
+             'one pair', 'high card']
+WIN_PCT_NAMES = {'straight flush': 'Straight Flush Wins Pct', 'four of a kind': 'Four of a Kind Win Pct',
+                 'full house': 'Full House Win Pct', 'flush': 'Flush Win Pct', 'straight': 'Straight Win Pct',
+                 'three of a kind': 'Three of a Kind Win Pct', 'two pairs': 'Two Pairs Win Pct',
+                 'one pair': 'One Pair Win Pct', 'high card': 'High Card Win Pct'}
+
+def _checkpoint(checkpoint_dir, name, **params):
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    suffix = ''.join('_' + key + str(value) for key, value in params.items())
+    return os.path.join(checkpoint_dir, name + suffix + '.csv')
+
+# One row per pocket-card combo with its class, hand type flags and win
+# percentage against 1..max_opponents opponents. Each of the 169 classes is
+# simulated once and its results are shared by the class's combos. An open
+# EquityCache passed as `cache` is used and left open, so the caller can read
+# its report; one at cache_path is opened and closed here.
+def pocket_hands_table(game_sims=10000, num_of_folding_players=0, batch_size=10000, workers=None, seed=0,
+                       shared_deals=True, tolerance=None, cache_path=None, checkpoint_dir='checkpoints',
+                       max_opponents=8, cache=None):
+    import pandas as pd
+    opponent_counts = range(1, max_opponents + 1)
+    win_pct_columns = ['Win Pct ' + str(n) for n in opponent_counts]
+    path = _checkpoint(checkpoint_dir, 'pocket_hand_classes', sims=game_sims, folds=num_of_folding_players,
+                       seed=seed, tol=tolerance, shared=int(shared_deals), opp=max_opponents)
+    classes_writer = ResultsWriter(path, [('Class', object)] + [(column, float) for column in win_pct_columns],
+                                   'Class', len(HAND_CLASSES))
+    equity_cache = cache
+    if equity_cache is None and cache_path:
+        equity_cache = EquityCache(cache_path)
+    try:
+        for label, class_row in iter_sweep_hand_classes(opponent_counts, game_sims, num_of_folding_players,
+                                                        batch_size, workers, seed, shared_deals, tolerance,
+                                                        equity_cache, skip=classes_writer.done):
+            class_row['Class'] = label
+            classes_writer.append(class_row)
+    finally:
+        classes_writer.close()
+        if equity_cache is not None and cache is None:
+            equity_cache.close()
+
+    # Final merge: expand the class results to every combo
+    class_columns = classes_writer.columns()
+    class_win_pcts = {label: {column: class_columns[column][i] for column in win_pct_columns}
+                      for i, label in enumerate(class_columns['Class'])}
+    pocket_deck = list(itertools.product(range(2, 15), ['Spade', 'Heart', 'Diamond', 'Club']))
+    rows = []
+    for hand in itertools.combinations(pocket_deck, 2):
+        hand = list(hand)
+        hand_dict = {'Pocket Cards': hand, 'Class': hand_class(hand), 'Pair': is_pocket_pair(hand),
+                     'Suited': is_suited(hand), 'Connected': is_connected(hand)}
+        hand_dict.update(class_win_pcts[hand_dict['Class']])
+        rows.append(hand_dict)
+    return pd.DataFrame(rows, columns=['Pocket Cards', 'Class', 'Pair', 'Suited', 'Connected'] + win_pct_columns[::-1])
+
+# pocket_hands_table's table from game_sims fully random deals, every seat
+# credited to its own hand (see poker.attribution). Returns that table, with
+# each class's pooled result on all of its combos, and a per-class table of
+# win percentages, their standard errors and effective trials.
+def attributed_pocket_hands_table(game_sims=1000000, batch_size=10000, workers=None, seed=0, importance=False,
+                                  checkpoint_dir='checkpoints', max_opponents=8):
+    import pandas as pd
+    path = _checkpoint(checkpoint_dir, 'attributed_pocket_hands', sims=game_sims, seed=seed,
+                       importance=int(importance), opp=max_opponents)[:-len('.csv')] + '.npz'
+    counts = attribute_seats(game_sims, max_opponents, batch_size, seed, importance, workers, checkpoint=path)
+    class_counts = counts.by_class()
+    win_pct, std_error, effective = class_counts.win_pct(), class_counts.std_error(), class_counts.effective_trials()
+
+    class_df = pd.DataFrame({'Class': HAND_CLASSES})
+    for n in range(1, max_opponents + 1):
+        class_df['Win Pct ' + str(n)] = win_pct[n - 1]
+        class_df['Win Pct SE ' + str(n)] = std_error[n - 1]
+        class_df['Effective Trials ' + str(n)] = effective[n - 1]
+
+    win_pct_columns = ['Win Pct ' + str(n) for n in range(1, max_opponents + 1)]
+    class_rows = class_df.set_index('Class')[win_pct_columns].to_dict('index')
+    pocket_deck = list(itertools.product(range(2, 15), ['Spade', 'Heart', 'Diamond', 'Club']))
+    rows = []
+    for hand in itertools.combinations(pocket_deck, 2):
+        hand = list(hand)
+        hand_dict = {'Pocket Cards': hand, 'Class': hand_class(hand), 'Pair': is_pocket_pair(hand),
+                     'Suited': is_suited(hand), 'Connected': is_connected(hand)}
+        hand_dict.update(class_rows[hand_dict['Class']])
+        rows.append(hand_dict)
+    hands_df = pd.DataFrame(rows, columns=['Pocket Cards', 'Class', 'Pair', 'Suited', 'Connected'] +
+                            win_pct_columns[::-1])
+    return hands_df, class_df
+
+# Percentage of showdowns won by each hand category, one row per player count.
+# With a batch_size, games are dealt and evaluated batch_size at a time with
+# NumPy; without one, they are played one deal at a time.
+# With record_dir, each player count's deals are logged to an OutcomeLog in
+# record_dir/players_<n> (batched runs only).
+def what_wins_table(sims=10000, seed=0, checkpoint_dir='checkpoints', player_counts=range(2, 10), batch_size=10000,
+                    record_dir=None):
+    wins_columns = ['Players Count'] + WIN_TYPES
+    path = _checkpoint(checkpoint_dir, 'winning_poker_hands', sims=sims, seed=seed, batched=int(bool(batch_size)))
+    wins_writer = ResultsWriter(path, [(column, np.int64) for column in wins_columns], 'Players Count',
+                                len(player_counts))
+    progress = instrument.progress(len(player_counts), 'what wins', 'player counts')
+    try:
+        # Simulate, skipping player counts already in the checkpoint
+        for n in player_counts:
+            if n in wins_writer:
+                progress.update()
+                continue
+            # Each player count has its own Generator, so a resumed run deals the same games
+            rng = np.random.default_rng([seed, n])
+            players_dict = dict.fromkeys(WIN_TYPES, 0)
+            players_dict['Players Count'] = n
+            if batch_size:
+                outcomes = None
+                if record_dir:
+                    # The count is simulated from the start, so deals logged
+                    # by an interrupted run would be logged twice
+                    outcomes = OutcomeLog(os.path.join(record_dir, 'players_%d' % n), n)
+                    outcomes.clear()
+                counts = simulate_winning_categories(n, sims, batch_size, rng, outcomes)
+                if outcomes is not None:
+                    outcomes.close()
+                for category, count in enumerate(counts.tolist()):
+                    if HAND_TYPES[category]:
+                        players_dict[HAND_TYPES[category]] = count
+            else:
+                dealer = Dealer(rng=rng)
+                for i in range(sims):
+                    result = holdem_simulation_winning_hand(n, dealer)
+                    players_dict[result] = players_dict[result] + 1
+            wins_writer.append(players_dict)
+            progress.update()
+    finally:
+        wins_writer.close()
+
+    wins_df = wins_writer.to_frame().sort_values('Players Count', ignore_index=True)
+    wins_df = wins_df.rename(columns=WIN_PCT_NAMES)
+    column_names = [WIN_PCT_NAMES[name] for name in WIN_TYPES]
+    wins_df[column_names] = wins_df[column_names].apply(lambda x: (x / sims) * 100)
+    return wins_df
+
+# '14S/13H'-style pocket labels back to [(14, 'S'), (13, 'H')]
+def split_cards(hand):
+    pocket = hand.split('/')
+    card1 = pocket[0]
+    card1 = (int(card1[:-1]), card1[-1])
+    card2 = pocket[1]
+    card2 = (int(card2[:-1]), card2[-1])
+
+    return [card1, card2]
+
+# How often each pocket-card combo is dealt in game_sims games per player
+# count. Returns the per-combo table and the same counts summed per class.
+# With a batch_size, deals are counted batch_size games at a time by combo
+# number; without one, they are dealt one game at a time as labels.
+def pocket_frequency_table(game_sims=10000, seed=0, checkpoint_dir='checkpoints', player_counts=range(2, 10),
+                           batch_size=10000):
+    import pandas as pd
+    hand_combinations = POCKET_LABELS
+
+    path = _checkpoint(checkpoint_dir, 'pocket_cards_frequency', sims=game_sims, seed=seed,
+                       batched=int(bool(batch_size)))
+    frequency_writer = ResultsWriter(path, [('Players Count', np.int64)] + [(key, np.int64) for key in hand_combinations],
+                                     'Players Count', len(player_counts))
+    progress = instrument.progress(len(player_counts), 'pocket frequency', 'player counts')
+    try:
+        # for each player count, simulate games
+        # for each game, record the pocket cards each player received
+        for n in player_counts:
+            if n in frequency_writer:
+                progress.update()
+                continue
+            rng = np.random.default_rng([seed, n])
+            if batch_size:
+                counts = simulate_pocket_counts(n, game_sims, batch_size, rng)
+                game_dict = dict(zip(hand_combinations, counts.tolist()))
+            else:
+                dealer = Dealer(rng=rng)
+                game_dict = {key: 0 for key in hand_combinations}
+                for i in range(game_sims):
+                    for result in holdem_pocket_cards_simulation(n, dealer):
+                        game_dict[result] += 1
+            game_dict['Players Count'] = n
+            frequency_writer.append(game_dict)
+            progress.update()
+    finally:
+        frequency_writer.close()
+
+    # Final merge: one frequency column per player count
+    frequency_columns = frequency_writer.columns()
+    hands_df = pd.DataFrame.from_dict({'Pocket Cards': hand_combinations})
+    for i, n in enumerate(frequency_columns['Players Count']):
+        hands_df['Frequency w/ ' + str(n) + ' players'] = [frequency_columns[key][i] for key in hand_combinations]
+    count_columns = ['Frequency w/ ' + str(n) + ' players' for n in player_counts]
+    hands_df = hands_df[['Pocket Cards'] + count_columns]
+
+    combo_cards = [pocket_cards(i) for i in range(NUM_COMBOS)]
+    hands_df['Pair'] = [is_pocket_pair(cards) for cards in combo_cards]
+    hands_df['Suited'] = [is_suited(cards) for cards in combo_cards]
+    hands_df['Connected'] = [is_connected(cards) for cards in combo_cards]
+    hands_df['Class'] = [hand_class(cards) for cards in combo_cards]
+
+    # Frequency per starting-hand class, with the number of combos in each class
+    class_frequency_df = hands_df.groupby('Class')[count_columns].sum().reindex(HAND_CLASSES)
+    class_frequency_df.insert(0, 'Combos', [CLASS_COMBOS[label] for label in HAND_CLASSES])
+    return hands_df, class_frequency_df
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpointed result tables
+
+ResultsWriter collects rows into preallocated column arrays and streams them
+to an append-only CSV checkpoint as it goes. Reopening the same checkpoint
+loads the rows already written, so a killed run resumes with only the
+missing rows left to compute. The finished table is built once at the end.
+"""
+
+import csv
+import os
+
+import numpy as np
+
+# A CSV field read back as `dtype`; bools are written as 'True' or 'False',
+# which a plain np.bool_('False') would read as True
+def _parse(value, dtype):
+    dtype = np.dtype(dtype)
+    if dtype == np.bool_:
+        return value == 'True'
+    return dtype.type(value)
+
+class ResultsWriter:
+    # columns maps column name -> NumPy dtype; key_column identifies a row
+    def __init__(self, path, columns, key_column, capacity, flush_every=1):
+        self.path = path
+        self.dtypes = dict(columns)
+        self.key_column = key_column
+        self.flush_every = flush_every
+        self.arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.dtypes.items()}
+        self.size = 0
+        self.done = set()
+        self.pending = []
+        if os.path.exists(path):
+            self._resume()
+        self.file = open(path, 'a', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=list(self.dtypes), lineterminator='\n')
+        if self.file.tell() == 0:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def _resume(self):
+        with open(self.path, newline='') as f:
+            lines = f.read().split('\n')
+        # The last line is either empty or was cut short by a crash; drop it
+        for row in csv.DictReader(lines[:-1]):
+            self._store({name: _parse(row[name], dtype) for name, dtype in self.dtypes.items()})
+        # Rewrite the checkpoint without the partial line
+        with open(self.path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.dtypes), lineterminator='\n')
+            writer.writeheader()
+            for i in range(self.size):
+                writer.writerow({name: array[i] for name, array in self.arrays.items()})
+
+    def _store(self, row):
+        if self.size == len(self.arrays[self.key_column]):
+            for name in self.arrays:
+                self.arrays[name] = np.resize(self.arrays[name], max(1, 2 * self.size))
+        for name, array in self.arrays.items():
+            array[self.size] = row[name]
+        self.done.add(row[self.key_column])
+        self.size += 1
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def append(self, row):
+        self._store(row)
+        self.pending.append({name: row[name] for name in self.dtypes})
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    # Write pending rows and make sure they reach the disk
+    def flush(self):
+        if self.pending:
+            self.writer.writerows(self.pending)
+            self.pending = []
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    # Completed rows as {column: array}
+    def columns(self):
+        return {name: array[:self.size] for name, array in self.arrays.items()}
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns())
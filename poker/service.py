@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+Local equity query service
+
+An asyncio HTTP/1.1 server, on a TCP port or a Unix socket, answering
+
+    POST /equity     {"hand": "AsKh", "board": "Qs Js 2d", "opponents": 3, "sims": 10000}
+    POST /what-wins  {"players": 6, "sims": 100000}
+    GET  /stats
+
+"opponents" is a number of random opponents or a list with one entry per
+opponent: null for any two cards, a hand like "QhQd", or {"range": "QQ+ AKs"};
+a top-level "range" gives every numbered opponent that range. Equity answers
+are win/tie/loss fractions from poker.spots, enumerated when that is cheap.
+
+Each query is first put in canonical form: cards sorted and, when no
+opponent has a range, suits relabelled to the smallest equivalent spot, so
+'AsKh on Qs Js 2d' and 'AhKs on Qh Jh 2d' are the same query. Answers come
+from an LRU cache of canonical queries when they can. Identical queries in
+flight share one computation. The rest are gathered for batch_window seconds
+(or until max_batch arrive) and solved together in a worker process, where
+sampled spots of the same shape share one set of vectorised evaluations. The
+event loop itself never simulates.
+
+    python -m poker serve --port 8765 --workers 4
+    python -m poker loadtest --port 8765 --requests 2000 --concurrency 32
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from poker.evaluator import SUIT_LETTERS, VALUE_LABELS, decode, encode, parse_cards
+
+MAX_SIMS = 1000000
+SAMPLE_CHUNK = 10000
+
+HTTP_REASONS = {200: b'OK', 400: b'Bad Request', 404: b'Not Found', 500: b'Internal Server Error'}
+
+SUIT_PERMUTATIONS = list(itertools.permutations(range(4)))
+
+QUERY_KEYS = {'equity': {'hand', 'board', 'opponents', 'range', 'sims'}, 'what-wins': {'players', 'sims'}}
+
+# Hero, every opponent and a full board are dealt from one deck
+MAX_OPPONENTS = (52 - 2 - 5) // 2
+
+def _cards(text):
+    if text is not None and not isinstance(text, str):
+        raise ValueError('cards must be a string like "AsKh", not %s' % json.dumps(text))
+    cards = encode(parse_cards(text or ''))
+    return tuple(sorted(cards))
+
+@lru_cache(maxsize=256)
+def _parse_range(text):
+    from poker.ranges import Range
+    return Range.parse(text)
+
+# (cache key, canonical query) for a JSON query; raises ValueError for bad ones
+def canonical_query(kind, query):
+    if not isinstance(query, dict):
+        raise ValueError('the query must be a JSON object')
+    unknown = sorted(set(query) - QUERY_KEYS[kind])
+    if unknown:
+        raise ValueError('unknown %s fields: %s (expected %s)' % (
+            kind, ', '.join(unknown), ', '.join(sorted(QUERY_KEYS[kind]))))
+    if kind == 'what-wins':
+        players = int(query.get('players', 2))
+        sims = int(query.get('sims', 10000))
+        if not 2 <= players <= 23 or not 0 < sims <= MAX_SIMS:
+            raise ValueError('players must be 2..23 and sims 1..%d' % MAX_SIMS)
+        canonical = {'kind': kind, 'players': players, 'sims': sims}
+        return (kind, players, sims), canonical
+
+    hero = _cards(query.get('hand'))
+    board = _cards(query.get('board'))
+    sims = int(query.get('sims', 10000))
+    if len(hero) != 2 or len(board) > 5 or not 0 < sims <= MAX_SIMS:
+        raise ValueError('need two hole cards, at most five board cards and 1..%d sims' % MAX_SIMS)
+    opponents = query.get('opponents', 1)
+    if isinstance(opponents, int) and not isinstance(opponents, bool):
+        opponents = [{'range': query['range']} if query.get('range') else None] * opponents
+    elif not isinstance(opponents, list):
+        raise ValueError('opponents must be a number or a list')
+    if len(opponents) > MAX_OPPONENTS:
+        raise ValueError('at most %d opponents fit in one deck' % MAX_OPPONENTS)
+    parsed = []
+    for opponent in opponents:
+        if opponent is None:
+            parsed.append(None)
+        elif isinstance(opponent, dict):
+            if set(opponent) != {'range'} or not isinstance(opponent['range'], str):
+                raise ValueError('a ranged opponent is {"range": "QQ+ AKs"}, not %s' % json.dumps(opponent))
+            _parse_range(opponent['range'])
+            parsed.append(('range', opponent['range']))
+        else:
+            parsed.append(('hand', _cards(opponent)))
+    if not parsed:
+        raise ValueError('need at least one opponent')
+    known = [card for opponent in parsed if opponent and opponent[0] == 'hand' for card in opponent[1]]
+    if len(set(hero + board + tuple(known))) != len(hero) + len(board) + len(known):
+        raise ValueError('the same card appears twice')
+
+    # Ranges aren't relabelled, so only spots without them are suit-canonical
+    if not any(opponent and opponent[0] == 'range' for opponent in parsed):
+        def relabel(cards, permutation):
+            return tuple(sorted(card - card % 4 + permutation[card % 4] for card in cards))
+        hero, board, parsed = min(
+            (relabel(hero, permutation), relabel(board, permutation),
+             sorted((('hand', relabel(opponent[1], permutation)) if opponent else ('random',))
+                    for opponent in parsed))
+            for permutation in SUIT_PERMUTATIONS)
+        parsed = [None if opponent == ('random',) else opponent for opponent in parsed]
+    canonical = {'kind': kind, 'hand': hero, 'board': board, 'opponents': parsed, 'sims': sims}
+    return (kind, hero, board, tuple(parsed), sims), canonical
+
+def _spot(query):
+    from poker.spots import Spot
+    opponents = [None if opponent is None else
+                 _parse_range(opponent[1]) if opponent[0] == 'range' else decode(opponent[1])
+                 for opponent in query['opponents']]
+    return Spot(decode(query['hand']), decode(query['board']), opponents)
+
+# A failed query's answer; bad input raises ValueError, anything else is
+# reported with its type
+def _error(error):
+    if isinstance(error, ValueError):
+        return {'error': str(error)}
+    return {'error': '%s: %s' % (type(error).__name__, error)}
+
+def _sample_group(group, sims, rng):
+    from poker.spots import sample_spots
+    totals = np.zeros((len(group), 3))
+    for start in range(0, sims, SAMPLE_CHUNK):
+        totals += sample_spots([spot for i, spot in group], min(SAMPLE_CHUNK, sims - start), rng)
+    return totals
+
+# Solve a batch of canonical queries; runs in a worker process. Sampled
+# equity queries with the same number of sims go through sample_spots together.
+# A query that fails gets an error answer without failing the rest.
+def solve_queries(queries):
+    from poker.batch import simulate_winning_categories
+    from poker.evaluator import HAND_TYPES
+    from poker.exact import EXACT_THRESHOLD
+
+    results = [None] * len(queries)
+    sampled = defaultdict(list)
+    for i, query in enumerate(queries):
+        try:
+            if query['kind'] == 'what-wins':
+                counts = simulate_winning_categories(query['players'], query['sims']).tolist()
+                results[i] = {HAND_TYPES[c]: count / query['sims'] for c, count in enumerate(counts) if HAND_TYPES[c]}
+                continue
+            spot = _spot(query)
+            size = spot.enumeration_size()
+            if size is not None and size <= EXACT_THRESHOLD:
+                results[i] = spot.equity()._asdict()
+            else:
+                sampled[query['sims']].append((i, spot))
+        except Exception as error:
+            results[i] = _error(error)
+
+    # Rows per evaluate_batch call stay near SAMPLE_CHUNK: queries with few
+    # sims are packed together, bigger arrays only cost cache misses
+    rng = np.random.default_rng()
+    for sims, members in sampled.items():
+        step = max(1, SAMPLE_CHUNK // sims)
+        for first in range(0, len(members), step):
+            group = members[first:first + step]
+            try:
+                group_totals = list(_sample_group(group, sims, rng))
+            except Exception:
+                # Sample the group's queries one by one so only the bad ones fail
+                group_totals = []
+                for member in group:
+                    try:
+                        group_totals.append(_sample_group([member], sims, rng)[0])
+                    except Exception as error:
+                        group_totals.append(error)
+            for (i, spot), counts in zip(group, group_totals):
+                if isinstance(counts, Exception):
+                    results[i] = _error(counts)
+                    continue
+                win, tie, loss = (counts / sims).tolist()
+                results[i] = {'win': win, 'tie': tie, 'loss': loss, 'deals': sims, 'exact': False}
+    return results
+
+class EquityService:
+    def __init__(self, workers=None, cache_size=10000, batch_window=0.002, max_batch=64):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.in_flight = {}
+        self.pending = []
+        self.timer = None
+        # Running _solve tasks; the event loop only keeps weak references
+        self.tasks = set()
+        self.stats = defaultdict(int)
+
+    async def query(self, kind, query):
+        key, canonical = canonical_query(kind, query)
+        self.stats['queries'] += 1
+        if key in self.cache:
+            self.stats['cache hits'] += 1
+            self.cache.move_to_end(key)
+            return dict(self.cache[key], cached=True)
+        if key in self.in_flight:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        loop = asyncio.get_running_loop()
+        self.in_flight[key] = loop.create_future()
+        self.pending.append((key, canonical))
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.batch_window, self._flush)
+        return await asyncio.shield(self.in_flight[key])
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self._solve(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    # Any failure is passed to the queries still waiting, so none is lost
+    async def _solve(self, batch):
+        self.stats['batches'] += 1
+        self.stats['queries solved'] += len(batch)
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, solve_queries, [query for key, query in batch])
+            for (key, query), result in zip(batch, results):
+                if 'error' not in result:
+                    self.cache[key] = result
+                    if len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+                self.in_flight.pop(key).set_result(result)
+        except Exception as error:
+            for key, query in batch:
+                if key in self.in_flight:
+                    self.in_flight.pop(key).set_exception(error)
+
+    def report(self):
+        stats = dict(self.stats)
+        if stats.get('batches'):
+            stats['mean batch size'] = stats['queries solved'] / stats['batches']
+        stats['cache entries'] = len(self.cache)
+        return stats
+
+    async def _respond(self, method, path, body):
+        if method == 'GET' and path == '/stats':
+            return 200, self.report()
+        if method == 'POST' and path in ('/equity', '/what-wins'):
+            try:
+                result = await self.query(path[1:], json.loads(body or b'{}'))
+            except (ValueError, KeyError, TypeError) as error:
+                return 400, {'error': str(error)}
+            return (400 if 'error' in result else 200), result
+        return 404, {'error': 'unknown endpoint %s %s' % (method, path)}
+
+    # One HTTP/1.1 connection; requests are served until the client closes it
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                try:
+                    status, payload = await self._respond(method, path, body)
+                except Exception as error:
+                    status, payload = 500, _error(error)
+                data = json.dumps(payload).encode()
+                writer.write(b'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n' % (
+                    status, HTTP_REASONS[status], len(data)) + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+async def serve(host='127.0.0.1', port=8765, unix=None, **options):
+    service = EquityService(**options)
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, unix)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    print('Serving on', unix or '%s:%d' % (host, port), flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+# Minimal keep-alive client for one connection
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765, unix=None):
+        if unix:
+            return cls(*await asyncio.open_unix_connection(unix))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.writer.write(b'%s %s HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n' % (
+            method.encode(), path.encode(), len(body)) + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+# `distinct` random flop spots against 1 to 3 random opponents
+def sample_queries(distinct, sims, seed=0):
+    rng = random.Random(seed)
+    deck = [VALUE_LABELS[value] + suit.lower() for value, suit in itertools.product(range(2, 15), SUIT_LETTERS)]
+    queries = []
+    for i in range(distinct):
+        cards = rng.sample(deck, 5)
+        queries.append({'hand': ' '.join(cards[:2]), 'board': ' '.join(cards[2:]),
+                        'opponents': rng.randint(1, 3), 'sims': sims})
+    return queries
+
+# Send `requests` equity queries over `concurrency` connections, drawn from
+# `distinct` spots, and report latency percentiles and throughput
+async def load_test(host='127.0.0.1', port=8765, unix=None, requests=1000, concurrency=16, distinct=200, sims=10000,
+                    seed=0):
+    queries = sample_queries(distinct, sims, seed)
+    rng = random.Random(seed)
+    order = [rng.choice(queries) for i in range(requests)]
+    latencies = []
+    errors = 0
+
+    async def client_loop(share):
+        nonlocal errors
+        client = await Client.connect(host, port, unix)
+        try:
+            for query in share:
+                start = time.perf_counter()
+                status, result = await client.request('POST', '/equity', query)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(order[i::concurrency]) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    client = await Client.connect(host, port, unix)
+    status, server_stats = await client.request('GET', '/stats')
+    client.close()
+    milliseconds = np.array(latencies) * 1000
+    return {'requests': requests, 'concurrency': concurrency, 'errors': errors, 'seconds': elapsed,
+            'requests per second': requests / elapsed,
+            'latency ms': {'p50': float(np.percentile(milliseconds, 50)),
+                           'p95': float(np.percentile(milliseconds, 95)),
+                           'p99': float(np.percentile(milliseconds, 99)), 'max': float(milliseconds.max())},
+            'server': server_stats}
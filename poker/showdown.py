@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Showdown functions
+
+Hand comparisons for cards given as (value, suit) tuples, on top of the
+lookup-table evaluator in poker.evaluator. poker.reference holds the original
+check_* implementation of the same rankings.
+
+A showdown makes one pass: the board is encoded and summarised once, each
+player's strength is finished from their two hole cards on top of it, and
+the winner and ties fall out of plain integer comparisons.
+"""
+
+from poker.evaluator import HAND_TYPES, board_state, encode, evaluate, evaluate_hole, hand_category
+
+# Comparable key for a hand: category and kicker values packed into one integer.
+# poker.evaluator.describe turns a key back into ('full house', (11, 7)).
+def hand_key(hand):
+    return evaluate(encode(hand))
+
+def check_hand(hand):
+    return hand_category(hand_key(hand))
+  
+def hand_type(hand):
+  return HAND_TYPES[check_hand(hand)]
+    
+def get_high_cards(hand):
+    values = [i[0] for i in hand]
+    return sorted(values, reverse = True)
+  
+def compare_cards(first_hand, second_hand, num=None):
+  first_high_cards = get_high_cards(first_hand)[:num]
+  second_high_cards = get_high_cards(second_hand)[:num]
+  
+  for i in range(len(first_high_cards)):
+    comparison = compare(first_high_cards[i], second_high_cards[i])
+    if comparison != 0:
+      return comparison
+    
+  return 0
+
+def compare(card1, card2):
+    if card1 > card2:
+      return 1
+    elif card1 < card2:
+      return 2
+    else:
+      return 0
+
+def break_tie(first_hand, second_hand):
+    return compare(hand_key(first_hand), hand_key(second_hand))
+
+# Create a function to determine if player won, lost, or tied, given a series of hands and the cards on the board
+def game_result(players_hand, other_players_hands, board):
+  return game_result_codes(encode(players_hand), [encode(hand) for hand in other_players_hands], encode(board))
+
+# Same as game_result for hands and board given as card codes
+def game_result_codes(players_hand, other_players_hands, board):
+  state = board_state(board)
+  # Check other players hands value first
+  best_other_player_hand = max(evaluate_hole(state, hand) for hand in other_players_hands)
+
+  # Compare player's hand with best other player's hand
+  players_hand = evaluate_hole(state, players_hand)
+
+  if players_hand > best_other_player_hand:
+    return 'Win'
+  elif players_hand == best_other_player_hand:
+    return 'Tie'
+  else:
+    return 'Loss'
+
+# Create a function to determine what was the winning card combination, given a series of hands and the cards on the board
+def winning_result(players_hands, board):
+  return winning_result_codes([encode(hand) for hand in players_hands], encode(board))
+
+def winning_result_codes(players_hands, board):
+  state = board_state(board)
+  best_player_hand = max(evaluate_hole(state, hand) for hand in players_hands)
+
+  return HAND_TYPES[hand_category(best_player_hand)]
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Hold'em simulation
+
+Single-deal simulators and game(), which estimates a hand's win percentage
+by enumeration, batched simulation or one deal at a time.
+"""
+
+import itertools
+
+from poker import instrument
+from poker.adaptive import adaptive_equity
+from poker.batch import simulate_games
+from poker.exact import EXACT_THRESHOLD, enumeration_size, exact_equity
+from poker.dealing import Dealer
+from poker.evaluator import SUIT_LETTERS, encode
+from poker.headsup import headsup_matrix
+from poker.ranges import COMBO_CARDS, opponent_ranges, sample_joint
+from poker.showdown import game_result_codes, winning_result_codes
+
+# Create the deck of cards
+# Deck key
+# 11 = Jack, 12 = Queen, 13 = King, 14 = Ace
+deck = list(itertools.product(range(2,15),['Spade','Heart','Diamond','Club']))
+
+# A Dealer can be passed in to reuse its buffer and Generator across games.
+# It is left as it was: the hero's cards are kept out of each deal, not
+# killed, unless the Dealer already holds them dead (the fast path).
+# `ranges` is a poker.ranges.Range for every opponent or a list with a Range
+# or None (uniformly random) per opponent.
+def holdem_simulation(players_hand, num_other_players, num_of_folding_players=0, dealer=None, ranges=None):
+  # Deal only what the game needs, two cards per opponent and the board.
+  # Burn cards are left out: they don't change the distribution of the rest.
+  clock = instrument.clock()
+  hero = encode(players_hand)
+  dealer = dealer or Dealer(hero)
+  held = [card for card in hero if not dealer.is_dead(card)]
+  ranges = opponent_ranges(ranges, num_other_players)
+  if ranges:
+    # Ranged opponents first, jointly, then everyone else and the board from what's left
+    ranged_seats = [i for i, opponent_range in enumerate(ranges) if opponent_range is not None]
+    dead_mask = dealer.dead_mask | sum(1 << card for card in held)
+    combos = sample_joint(dead_mask, [ranges[i] for i in ranged_seats], 1, dealer.rng)[0]
+    ranged_hands = {i: COMBO_CARDS[combo].tolist() for i, combo in zip(ranged_seats, combos)}
+    held += [card for hand in ranged_hands.values() for card in hand]
+    cards = dealer.deal(2 * (num_other_players - len(ranged_hands)) + 5, exclude=held)
+    dealt = iter(cards[2 * i:2 * i + 2] for i in range(num_other_players - len(ranged_hands)))
+    other_players_hands = [ranged_hands[i] if i in ranged_hands else next(dealt) for i in range(num_other_players)]
+  else:
+    cards = dealer.deal(2 * num_other_players + 5, exclude=held)
+    other_players_hands = [cards[2 * i:2 * i + 2] for i in range(num_other_players)]
+  board = cards[-5:]
+
+  # Handle folding of other players if set
+  if num_of_folding_players > 0 and num_of_folding_players < num_other_players:
+    # Random folding, any opponent can fold
+    folding_players = {dealer.randint(num_other_players) for i in range(num_of_folding_players)}
+    other_players_hands = [hand for i, hand in enumerate(other_players_hands) if i not in folding_players]
+  clock.lap('deal')
+
+  result = game_result_codes(hero, other_players_hands, board)
+  clock.lap('evaluate')
+  instrument.count('sims')
+  instrument.count('hand evaluations', len(other_players_hands) + 1)
+  return result
+
+second_deck = list(itertools.product(range(2,15),['Spade','Heart','Diamond','Club']))
+
+def holdem_simulation_winning_hand(num_of_players, dealer=None):
+  clock = instrument.clock()
+  cards = (dealer or Dealer()).deal(2 * num_of_players + 5)
+  players_hands = [cards[2 * i:2 * i + 2] for i in range(num_of_players)]
+  clock.lap('deal')
+  result = winning_result_codes(players_hands, cards[-5:])
+  clock.lap('evaluate')
+  instrument.count('sims')
+  instrument.count('hand evaluations', num_of_players)
+  return result
+
+# Game Simulation
+
+# `ranges` gives opponents weighted hand ranges instead of uniformly random
+# hands, as in holdem_simulation
+# With `outcomes`, a poker.outcomes.OutcomeLog, all game_sims deals are
+# simulated in batches and logged.
+def game(players_hand, num_of_other_players, game_sims, num_of_folding_players, batch_size=None, board=None, exact_threshold=EXACT_THRESHOLD, tolerance=None, ranges=None, outcomes=None):
+    wins = 0
+    board = board or []
+    ranges = opponent_ranges(ranges, num_of_other_players)
+
+    if outcomes is not None:
+      batch_wins, batch_ties, batch_losses = simulate_games(
+        players_hand, num_of_other_players, game_sims, num_of_folding_players, batch_size or 10000, board=board, ranges=ranges, outcomes=outcomes)
+      return (batch_wins + batch_ties) / game_sims * 100
+
+    # Heads-up preflop: read the answer off the exact matrix when one is mapped
+    if num_of_other_players == 1 and not board and headsup_matrix() is not None:
+      win, tie, loss = headsup_matrix().range_equity(players_hand, ranges[0] if ranges else None)
+      return (win + tie) * 100
+
+    # Heads-up with few enough possible deals left: enumerate them all instead of sampling
+    if num_of_other_players == 1 and not ranges and enumeration_size(len(players_hand) + len(board), len(board), 1) <= exact_threshold:
+      win, tie, loss = exact_equity(players_hand, [None], board)
+      return (win + tie) * 100
+
+    # Stop early once the win percentage is known to +/- tolerance points, up to game_sims sims
+    if tolerance:
+      return adaptive_equity(players_hand, num_of_other_players, tolerance, game_sims, num_of_folding_players, batch_size or 1000, board=board, ranges=ranges).win_pct
+
+    if batch_size or board:
+      # Deal and evaluate batch_size games at a time with NumPy
+      batch_wins, batch_ties, batch_losses = simulate_games(
+        players_hand, num_of_other_players, game_sims, num_of_folding_players, batch_size or 10000, board=board, ranges=ranges)
+      wins = batch_wins + batch_ties
+    else:
+      dealer = Dealer(encode(players_hand))
+      for i in range(game_sims):
+        result = holdem_simulation(players_hand, num_of_other_players, num_of_folding_players, dealer, ranges)
+        if result == 'Win' or result == 'Tie':
+          wins += 1
+        
+    win_percentage = (wins / game_sims) * 100
+    return win_percentage
+
+new_deck = list(itertools.product(range(2,15),['C', 'D', 'H', 'S']))
+
+# Pocket labels like '10C/14S': value then suit letter, cards in (value, suit letter) order
+POCKET_CARD_LABELS = [str(card // 4 + 2) + SUIT_LETTERS[card % 4] for card in range(52)]
+POCKET_SORT_KEYS = [(card // 4, SUIT_LETTERS[card % 4]) for card in range(52)]
+
+def holdem_pocket_cards_simulation(num_of_players, dealer=None):
+  cards = (dealer or Dealer()).deal(2 * num_of_players)
+  players_hands = []
+  for i in range(num_of_players):
+    player_hand = sorted(cards[2 * i:2 * i + 2], key=POCKET_SORT_KEYS.__getitem__)
+    players_hands.append(POCKET_CARD_LABELS[player_hand[0]] + '/' + POCKET_CARD_LABELS[player_hand[1]])
+  return players_hands
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Known-board equity
+
+Equity for a spot in the middle of a hand: the player's cards, 0 to 5 known
+board cards, and opponents whose hands are known, drawn from a Range or
+uniformly random. Only the missing board cards and unknown hands are dealt.
+When one opponent at most is unknown and the remaining runouts times that
+opponent's possible hands number no more than exact_threshold, they are all
+enumerated instead. Rank and suit counts of the known board, and of the board
+plus each known hand, are computed once and added onto every deal.
+"""
+
+import itertools
+from collections import namedtuple
+from math import comb
+
+import numpy as np
+
+from poker.batch import card_counts, evaluate_batch
+from poker.dealing import default_rng
+from poker.evaluator import encode
+from poker.exact import CHUNK_SIZE, EXACT_THRESHOLD
+from poker.pockets import NUM_COMBOS
+from poker.ranges import COMBO_CARDS, COMBO_MASKS, Range, card_mask, deal_ranged
+
+# Fractions of deals won, tied and lost, the number of deals behind them and
+# whether they were enumerated
+SpotEquity = namedtuple('SpotEquity', ['win', 'tie', 'loss', 'deals', 'exact'])
+
+class Spot:
+    # opponents: a number of random opponents, or a list with one entry per
+    # opponent: a hand of (value, suit) cards, a Range, or None for any two cards
+    def __init__(self, players_hand, board=None, opponents=1):
+        if isinstance(opponents, int):
+            opponents = [None] * opponents
+        self.hero = encode(players_hand)
+        self.board = encode(board or [])
+        if len(self.board) > 5:
+            raise ValueError('A board has at most 5 cards')
+        self.known_hands = [encode(hand) for hand in opponents if hand is not None and not isinstance(hand, Range)]
+        self.unknown = [hand for hand in opponents if hand is None or isinstance(hand, Range)]
+        if not self.known_hands and not self.unknown:
+            raise ValueError('A spot needs at least one opponent')
+
+        self.dead = self.hero + self.board + [card for hand in self.known_hands for card in hand]
+        if len(set(self.dead)) != len(self.dead):
+            raise ValueError('The same card appears twice in the spot')
+        self.remaining = [card for card in range(52) if card not in set(self.dead)]
+        self.board_cards_needed = 5 - len(self.board)
+
+        # Counts shared by every deal: the board alone, and the board with each known hand
+        board = np.array([self.board], dtype=np.int64).reshape(1, len(self.board))
+        self.board_base = card_counts(board)
+        self.hero_base = card_counts(np.hstack([board, [self.hero]]))
+        self.known_bases = [card_counts(np.hstack([board, [hand]])) for hand in self.known_hands]
+
+    # Deals exact enumeration would visit
+    def enumeration_size(self):
+        if len(self.unknown) > 1:
+            return None
+        size = comb(len(self.remaining), self.board_cards_needed)
+        if self.unknown:
+            size *= len(self._unknown_combos()[0])
+        return size
+
+    # Combos the unknown opponent can hold given the known cards, with weights
+    def _unknown_combos(self):
+        opponent_range = self.unknown[0]
+        combos = np.arange(NUM_COMBOS) if opponent_range is None else opponent_range.combos
+        combos = combos[COMBO_MASKS[combos] & card_mask(self.dead) == 0]
+        if not len(combos):
+            raise ValueError('Every combo in the range collides with cards already dealt')
+        if opponent_range is None:
+            return combos, np.ones(len(combos))
+        return combos, opponent_range.weights[combos]
+
+    # Win and tie flags per deal for (M, board_cards_needed) runouts and
+    # (M, len(unknown), 2) unknown hands
+    def showdown(self, runouts, unknown_hands):
+        players_strength = evaluate_batch(runouts, self.hero_base)
+        best_other = np.full(len(runouts), -1, dtype=np.int64)
+        for base in self.known_bases:
+            best_other = np.maximum(best_other, evaluate_batch(runouts, base))
+        for i in range(unknown_hands.shape[1]):
+            best_other = np.maximum(best_other, evaluate_batch(np.hstack([unknown_hands[:, i], runouts]),
+                                                               self.board_base))
+        return players_strength > best_other, players_strength == best_other
+
+    # Weighted (win, tie, loss) totals and number of deals over every runout
+    # and every hand the unknown opponent, if any, can hold
+    def enumerate(self):
+        if self.unknown:
+            combos, weights = self._unknown_combos()
+        else:
+            combos, weights = np.zeros(1, dtype=np.intp), np.ones(1)
+        runouts = itertools.combinations(self.remaining, self.board_cards_needed)
+        rows_per_chunk = max(1, CHUNK_SIZE // len(combos))
+        totals = np.zeros(3)
+        deals = 0
+        while True:
+            chunk = list(itertools.islice(runouts, rows_per_chunk))
+            if not chunk:
+                break
+            chunk = np.array(chunk, dtype=np.int64).reshape(len(chunk), self.board_cards_needed)
+            runout_index = np.repeat(np.arange(len(chunk)), len(combos))
+            combo_index = np.tile(np.arange(len(combos)), len(chunk))
+            if self.unknown:
+                runout_masks = (1 << chunk).sum(axis=1)
+                live = COMBO_MASKS[combos[combo_index]] & runout_masks[runout_index] == 0
+                runout_index, combo_index = runout_index[live], combo_index[live]
+                unknown_hands = COMBO_CARDS[combos[combo_index]][:, None, :]
+            else:
+                unknown_hands = np.zeros((len(runout_index), 0, 2), dtype=np.int64)
+            wins, ties = self.showdown(chunk[runout_index], unknown_hands)
+            deal_weights = weights[combo_index]
+            totals += [deal_weights[wins].sum(), deal_weights[ties].sum(), deal_weights[~wins & ~ties].sum()]
+            deals += len(runout_index)
+        return totals, deals
+
+    # (win, tie, loss) counts from n_games random deals of the unknown cards
+    def sample(self, n_games, rng):
+        unknown_hands, runouts = deal_ranged(self.dead, self.unknown, n_games, self.board_cards_needed, rng)
+        wins, ties = self.showdown(runouts, unknown_hands)
+        return np.array([wins.sum(), ties.sum(), n_games - wins.sum() - ties.sum()])
+
+    def equity(self, sims=10000, exact_threshold=EXACT_THRESHOLD, batch_size=10000, rng=None):
+        size = self.enumeration_size()
+        if size is not None and size <= exact_threshold:
+            totals, deals = self.enumerate()
+            exact = True
+        else:
+            rng = default_rng(rng)
+            totals = np.zeros(3)
+            for start in range(0, sims, batch_size):
+                totals += self.sample(min(batch_size, sims - start), rng)
+            deals = sims
+            exact = False
+        win, tie, loss = (totals / totals.sum()).tolist()
+        return SpotEquity(win, tie, loss, deals, exact)
+
+# Equity of players_hand on a partly known board; see Spot
+def board_equity(players_hand, board=None, opponents=1, sims=10000, exact_threshold=EXACT_THRESHOLD,
+                 batch_size=10000, rng=None):
+    return Spot(players_hand, board, opponents).equity(sims, exact_threshold, batch_size, rng)
+
+# Sample n_games deals for each of several spots with one set of evaluate_batch
+# calls per group of spots of the same shape (board cards missing, known and
+# unknown opponents). Returns one (win, tie, loss) count array per spot.
+def sample_spots(spots, n_games, rng=None):
+    rng = default_rng(rng)
+    groups = {}
+    for i, spot in enumerate(spots):
+        groups.setdefault((spot.board_cards_needed, len(spot.known_hands), len(spot.unknown)), []).append(i)
+    results = [None] * len(spots)
+    for members in groups.values():
+        group = [spots[i] for i in members]
+        deals = [deal_ranged(spot.dead, spot.unknown, n_games, spot.board_cards_needed, rng) for spot in group]
+        unknown_hands = np.concatenate([hands for hands, runouts in deals])
+        runouts = np.concatenate([runouts for hands, runouts in deals])
+
+        # Each spot's shared counts, repeated over its n_games rows
+        def stacked(bases):
+            return tuple(np.repeat(np.concatenate(parts), n_games, axis=0) for parts in zip(*bases))
+
+        players_strength = evaluate_batch(runouts, stacked([spot.hero_base for spot in group]))
+        best_other = np.full(len(runouts), -1, dtype=np.int64)
+        for j in range(len(group[0].known_hands)):
+            best_other = np.maximum(best_other, evaluate_batch(runouts, stacked([spot.known_bases[j]
+                                                                                 for spot in group])))
+        board_base = stacked([spot.board_base for spot in group])
+        for j in range(unknown_hands.shape[1]):
+            best_other = np.maximum(best_other, evaluate_batch(np.hstack([unknown_hands[:, j], runouts]),
+                                                               board_base))
+        wins = (players_strength > best_other).reshape(len(group), n_games).sum(axis=1)
+        ties = (players_strength == best_other).reshape(len(group), n_games).sum(axis=1)
+        for i, win, tie in zip(members, wins.tolist(), ties.tolist()):
+            results[i] = np.array([win, tie, n_games - win - tie])
+    return results
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Starting-hand classes
+
+Two hole cards fall into one of 169 suit-isomorphic classes: 13 pairs ("77",
+6 combos each), 78 suited hands ("AKs", 4 combos) and 78 offsuit hands
+("T9o", 12 combos). Every combo of a class has the same equity against
+uniformly dealt opponents, so a class only needs to be simulated once.
+"""
+
+import itertools
+
+from poker.evaluator import LABEL_VALUES, SUITS, VALUE_LABELS
+
+# Functions to detect hand type
+def is_pocket_pair(cards):
+    if cards[0][0] == cards[1][0]:
+        return True
+    else:
+        return False
+
+def is_suited(cards):
+    if cards[0][1] == cards[1][1]:
+        return True
+    else:
+        return False
+
+def is_connected(cards):
+    if (cards[0][0] + 1) == cards[1][0]:
+        return True
+    elif (cards[0][0] - 1) == cards[1][0]:
+        return True
+    elif cards[0][0] == 14:
+        if cards[1][0] == 2:
+            return True
+        else:
+            return False
+    elif cards[0][0] == 2:
+        if cards[0][1] == 14:
+            return True
+        else:
+            return False
+    else:
+        return False
+
+# Class label of two hole cards, e.g. 'AKs', 'T9o' or '77'
+def hand_class(cards):
+    high = max(cards[0][0], cards[1][0])
+    low = min(cards[0][0], cards[1][0])
+    if is_pocket_pair(cards):
+        return VALUE_LABELS[high] * 2
+    elif is_suited(cards):
+        return VALUE_LABELS[high] + VALUE_LABELS[low] + 's'
+    else:
+        return VALUE_LABELS[high] + VALUE_LABELS[low] + 'o'
+
+# Every class, pairs on the diagonal of the usual 13x13 grid:
+# AA, AKs, AKo, AQs, ..., KK, KQs, ...
+HAND_CLASSES = []
+for _high in range(14, 1, -1):
+    for _low in range(_high, 1, -1):
+        if _high == _low:
+            HAND_CLASSES.append(VALUE_LABELS[_high] * 2)
+        else:
+            HAND_CLASSES.append(VALUE_LABELS[_high] + VALUE_LABELS[_low] + 's')
+            HAND_CLASSES.append(VALUE_LABELS[_high] + VALUE_LABELS[_low] + 'o')
+
+# Concrete two-card hands of a class, highest card first
+def class_combos(label):
+    high = LABEL_VALUES[label[0]]
+    low = LABEL_VALUES[label[1]]
+    if high == low:
+        return [[(high, a), (low, b)] for a, b in itertools.combinations(SUITS, 2)]
+    elif label[2] == 's':
+        return [[(high, suit), (low, suit)] for suit in SUITS]
+    else:
+        return [[(high, a), (low, b)] for a, b in itertools.permutations(SUITS, 2)]
+
+# Number of combos per class: 6 for pairs, 4 for suited and 12 for offsuit hands
+CLASS_COMBOS = {label: len(class_combos(label)) for label in HAND_CLASSES}
+
+def class_representative(label):
+    return class_combos(label)[0]
+
+# Classes from strongest to weakest by equity against one random hand (ties
+# count half), from 400,000 simulated deals per class
+CLASS_RANKING = ['AA', 'KK', 'QQ', 'JJ', 'TT', '99', '88', 'AKs', '77', 'AQs', 'AJs', 'AKo', 'ATs', 'AQo', 'AJo',
+                 'KQs', '66', 'A9s', 'KJs', 'ATo', 'A8s', 'KTs', 'KQo', 'A7s', 'A9o', 'KJo', '55', 'QJs', 'K9s',
+                 'A8o', 'A5s', 'A6s', 'KTo', 'QTs', 'A4s', 'A7o', 'K8s', 'QJo', 'A3s', 'K9o', 'A6o', 'A5o', 'JTs',
+                 'Q9s', 'K7s', 'A2s', 'QTo', '44', 'A4o', 'K6s', 'K8o', 'Q8s', 'A3o', 'K5s', 'J9s', 'Q9o', 'K7o',
+                 'JTo', 'A2o', 'K4s', 'Q7s', 'K6o', 'K3s', 'T9s', 'J8s', '33', 'Q8o', 'Q6s', 'K5o', 'J9o', 'K2s',
+                 'Q5s', 'T8s', 'J7s', 'K4o', 'Q4s', 'Q7o', 'T9o', 'J8o', 'K3o', 'Q6o', 'Q3s', '98s', 'T7s', 'J6s',
+                 'K2o', 'Q2s', '22', 'Q5o', 'J5s', 'T8o', 'J7o', 'Q4o', '97s', 'T6s', 'J4s', 'J3s', '98o', 'Q3o',
+                 '87s', 'T7o', 'J6o', '96s', 'J2s', 'Q2o', 'J5o', 'T5s', 'T4s', '97o', 'J4o', '86s', 'T6o', '95s',
+                 'T3s', 'J3o', '76s', '87o', 'T2s', '85s', '96o', 'J2o', 'T5o', '94s', '75s', 'T4o', '65s', '86o',
+                 '93s', '95o', '84s', 'T3o', '76o', '92s', '74s', 'T2o', '85o', '54s', '64s', '83s', '75o', '94o',
+                 '82s', '93o', '73s', '65o', '53s', '63s', '84o', '92o', '43s', '74o', '54o', '72s', '64o', '52s',
+                 '62s', '83o', '82o', '42s', '73o', '53o', '63o', '32s', '43o', '72o', '52o', '62o', '42o', '32o']
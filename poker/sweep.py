@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel pocket-hand sweep
+
+Splits (hand, opponent count) work units across a process pool. Every unit
+draws from its own np.random.Generator, seeded from a SeedSequence keyed by
+the unit's position in the sweep, so results are identical for any number of
+workers and across resumed runs.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from poker import instrument
+from poker.adaptive import adaptive_counts, adaptive_counts_shared
+from poker.batch import simulate_games, simulate_games_shared
+from poker.starting_hands import HAND_CLASSES, class_representative, hand_class
+
+# Generator for a work unit: the hand's position in the sweep, the unit's
+# group of opponent counts within the hand, and `offset`, the number of trials
+# already stored for the unit's cells so that topping up a cached cell draws
+# fresh deals. Keying on positions keeps results the same however the sweep is
+# split up, resumed or spread over workers.
+def unit_rng(seed, hand_index, group=0, offset=0):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(hand_index, group, offset)))
+
+# Ties count towards the win percentage, as in game()
+def _win_pct(wins, ties, trials):
+    return (wins + ties) / trials * 100
+
+# Each unit returns one (wins, ties, trials) per opponent count it covers
+def _run_unit(args):
+    rng_key, seed, hand, opponent_counts, game_sims, num_of_folding_players, batch_size, tolerance = args
+    rng = unit_rng(seed, *rng_key)
+    num_other_players = opponent_counts[0]
+    if tolerance:
+        counts, sims = adaptive_counts(hand, num_other_players, tolerance, game_sims, num_of_folding_players,
+                                       batch_size, rng)
+        return [(int(counts[0]), int(counts[1]), sims)]
+    wins, ties, losses = simulate_games(hand, num_other_players, game_sims, num_of_folding_players,
+                                        batch_size, rng)
+    return [(wins, ties, game_sims)]
+
+# One unit per hand: every opponent count is read off the same deals
+def _run_shared_unit(args):
+    rng_key, seed, hand, opponent_counts, game_sims, num_of_folding_players, batch_size, tolerance = args
+    rng = unit_rng(seed, *rng_key)
+    if tolerance:
+        counts, sims = adaptive_counts_shared(hand, max(opponent_counts), tolerance, game_sims,
+                                              num_of_folding_players, batch_size, rng)
+    else:
+        counts = simulate_games_shared(hand, max(opponent_counts), game_sims, num_of_folding_players,
+                                       batch_size, rng)
+        sims = game_sims
+    counts = counts.tolist()
+    return [(counts[n - 1][0], counts[n - 1][1], sims) for n in opponent_counts]
+
+# Run a unit in a worker process with instrumentation on, and send back its
+# stats along with the result
+def _run_instrumented(args):
+    run_unit, unit = args
+    instrument.enable()
+    result = run_unit(unit)
+    return result, instrument.disable().snapshot()
+
+def _merge_stats(results):
+    for result, snapshot in results:
+        instrument.merge(snapshot)
+        yield result
+
+# Win percentages for every hand against every opponent count, yielded as
+# (hand index, {'Win Pct n': pct}) in hand order as soon as each hand is done.
+# Hands whose index is in `skip` are left out.
+# With shared_deals, each hand is simulated once against max(opponent_counts)
+# opponents and smaller counts use the first opponents of the same deals.
+# With a tolerance, units stop once their confidence interval is within
+# +/- tolerance percentage points, and game_sims becomes the cap.
+# With an EquityCache, cells reuse the stored samples of the hand's class and
+# only simulate what is missing up to game_sims; new samples are stored. Each
+# class is then simulated once, on its first hand, and its other hands share
+# the result.
+def iter_sweep_pocket_hands(hands, opponent_counts=range(1, 9), game_sims=10000, num_of_folding_players=0,
+                            batch_size=10000, workers=None, seed=0, shared_deals=False, tolerance=None, cache=None,
+                            skip=()):
+    opponent_counts = list(opponent_counts)
+    hands = [[tuple(card) for card in hand] for hand in hands]
+    hand_indexes = [i for i in range(len(hands)) if i not in skip]
+    groups = [opponent_counts] if shared_deals else [[n] for n in opponent_counts]
+
+    # The hand whose results each hand reports: itself, or with a cache the
+    # first hand of its class
+    leader = {}
+    first_hands = {}
+    for i in hand_indexes:
+        leader[i] = first_hands.setdefault(hand_class(hands[i]) if cache is not None else i, i)
+
+    # (wins, ties, trials) per leading hand and opponent count, starting from the cache
+    totals = {}
+    units = []
+    hand_units = {}
+    for i in hand_indexes:
+        hand_units[i] = []
+        if leader[i] != i:
+            continue
+        for n in opponent_counts:
+            if cache is not None:
+                totals[i, n] = cache.lookup(hand_class(hands[i]), n, num_of_folding_players, game_sims)
+            else:
+                totals[i, n] = (0, 0, 0)
+        for group_index, group in enumerate(groups):
+            done = min(totals[i, n][2] for n in group)
+            if cache is not None:
+                cache.count_deals(reused=min(done, game_sims))
+            if done < game_sims:
+                hand_units[i].append(group)
+                units.append(((i, group_index, done), seed, hands[i], group, game_sims - done,
+                              num_of_folding_players, batch_size, tolerance))
+    run_unit = _run_shared_unit if shared_deals else _run_unit
+
+    workers = workers or os.cpu_count()
+    executor = None
+    if workers == 1 or len(units) <= 1:
+        results = map(run_unit, units)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, min(len(units) // (workers * 8), 16))
+        if instrument.active():
+            results = _merge_stats(executor.map(_run_instrumented, [(run_unit, unit) for unit in units],
+                                                chunksize=chunksize))
+        else:
+            results = executor.map(run_unit, units, chunksize=chunksize)
+
+    progress = instrument.progress(len(hand_indexes), 'sweep', 'hands')
+    try:
+        for i in hand_indexes:
+            for group in hand_units[i]:
+                unit_results = next(results)
+                for n, (wins, ties, trials) in zip(group, unit_results):
+                    old_wins, old_ties, old_trials = totals[i, n]
+                    totals[i, n] = (old_wins + wins, old_ties + ties, old_trials + trials)
+                    if cache is not None:
+                        cache.add(hand_class(hands[i]), n, num_of_folding_players, wins, ties, trials)
+                if cache is not None:
+                    cache.count_deals(run=max(trials for wins, ties, trials in unit_results))
+            if cache is not None:
+                cache.commit()
+            progress.update()
+            yield i, {'Win Pct ' + str(n): _win_pct(*totals[leader[i], n]) for n in opponent_counts}
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+# Same as iter_sweep_pocket_hands, returning one row per hand in order
+def sweep_pocket_hands(hands, opponent_counts=range(1, 9), game_sims=10000, num_of_folding_players=0,
+                       batch_size=10000, workers=None, seed=0, shared_deals=False, tolerance=None, cache=None):
+    return [row for i, row in iter_sweep_pocket_hands(hands, opponent_counts, game_sims, num_of_folding_players,
+                                                      batch_size, workers, seed, shared_deals, tolerance, cache)]
+
+# Win percentages for each of the 169 starting-hand classes, simulated once
+# per class on a representative combo, yielded as (class label, row).
+# Classes in `skip` are left out.
+def iter_sweep_hand_classes(opponent_counts=range(1, 9), game_sims=10000, num_of_folding_players=0,
+                            batch_size=10000, workers=None, seed=0, shared_deals=False, tolerance=None, cache=None,
+                            skip=()):
+    hands = [class_representative(label) for label in HAND_CLASSES]
+    skip = {HAND_CLASSES.index(label) for label in skip}
+    for i, row in iter_sweep_pocket_hands(hands, opponent_counts, game_sims, num_of_folding_players, batch_size,
+                                          workers, seed, shared_deals, tolerance, cache, skip):
+        yield HAND_CLASSES[i], row
+
+# Returns {class label: {'Win Pct n': pct}}
+def sweep_hand_classes(opponent_counts=range(1, 9), game_sims=10000, num_of_folding_players=0,
+                       batch_size=10000, workers=None, seed=0, shared_deals=False, tolerance=None, cache=None):
+    return dict(iter_sweep_hand_classes(opponent_counts, game_sims, num_of_folding_players, batch_size, workers,
+                                        seed, shared_deals, tolerance, cache))
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Shared evaluator tables
+
+The batch evaluator's lookup tables are built once and saved to a versioned
+binary file. Every process then maps that file read-only with np.memmap,
+instead of building its own copy, so all the workers on a machine share one
+copy in the page cache. Set POKER_TABLES to the file's path (the CLI's
+--tables does this) and poker.batch loads its tables from there, building and
+saving the file first if it is missing or was written for another evaluator
+version. Without it, each process builds the tables in memory as before.
+
+    python -m poker.tables evaluator_tables.bin --workers 8
+
+builds the file and reports build time, load time and memory per worker.
+
+File layout: the 8-byte magic, a 4-byte little-endian header length, a JSON
+header giving the format and evaluator versions and each array's dtype, shape
+and offset, then the arrays' bytes at 64-byte aligned offsets.
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from poker.evaluator import EVALUATOR_VERSION, FLUSH_TABLE, straight_top
+
+MAGIC = b'PKRTABLE'
+TABLES_FORMAT = 1
+TABLES_ENV = 'POKER_TABLES'
+ALIGNMENT = 64
+
+# 13-bit rank mask tables (bit 0 = deuce)
+def build_tables():
+    masks = np.arange(1 << 13)
+    high_bit = np.zeros(1 << 13, dtype=np.int64)
+    high_value = np.zeros(1 << 13, dtype=np.int64)
+    for r in range(13):
+        has_bit = (masks >> r) & 1 == 1
+        high_bit[has_bit] = 1 << r
+        high_value[has_bit] = r + 2
+    tables = {'high_bit': high_bit, 'high_value': high_value}
+    # top_values_k[mask] packs the k highest values of mask into k nibbles,
+    # highest first, padded with zeros on the right
+    top = np.zeros(1 << 13, dtype=np.int64)
+    rest = masks.copy()
+    tables['top_values_0'] = top
+    for k in range(1, 6):
+        top = top << 4 | high_value[rest]
+        rest = rest & ~high_bit[rest]
+        tables['top_values_%d' % k] = top
+    tables['straight_top'] = np.array([straight_top(mask) for mask in range(1 << 13)], dtype=np.int64)
+    tables['flush_strength'] = np.array([FLUSH_TABLE[mask] if bin(mask).count('1') >= 5 else 0
+                                         for mask in range(1 << 13)], dtype=np.int64)
+    return tables
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+# Write the tables to `path`; the file is only replaced once complete. Other
+# array files (poker.headsup) use the same layout with their own magic.
+def save_tables(tables, path, magic=MAGIC):
+    header = {'format': TABLES_FORMAT, 'evaluator version': EVALUATOR_VERSION, 'arrays': {}}
+    offset = 0
+    for name, array in tables.items():
+        header['arrays'][name] = [array.dtype.str, list(array.shape), offset]
+        offset = _aligned(offset + array.nbytes)
+    # Offsets are relative to the end of the header, itself padded to ALIGNMENT
+    header_bytes = json.dumps(header).encode()
+    data_start = _aligned(len(magic) + 4 + len(header_bytes))
+    temporary = '%s.%d.tmp' % (path, os.getpid())
+    with open(temporary, 'wb') as f:
+        f.write(magic + struct.pack('<I', len(header_bytes)) + header_bytes)
+        for name, array in tables.items():
+            f.seek(data_start + header['arrays'][name][2])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(temporary, path)
+
+# Read-only arrays mapped from `path`. Raises ValueError if the file isn't a
+# table file of the current format and evaluator version.
+def load_tables(path, magic=MAGIC):
+    with open(path, 'rb') as f:
+        if f.read(len(magic)) != magic:
+            raise ValueError('%s is not a %s file' % (path, magic.decode()))
+        header_length, = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_length))
+    if header['format'] != TABLES_FORMAT or header['evaluator version'] != EVALUATOR_VERSION:
+        raise ValueError('%s holds tables for format %s, evaluator version %s' % (
+            path, header['format'], header['evaluator version']))
+    data_start = _aligned(len(magic) + 4 + header_length)
+    tables = {}
+    for name, (dtype, shape, offset) in header['arrays'].items():
+        array = np.memmap(path, dtype=np.dtype(dtype), mode='r', offset=data_start + offset, shape=tuple(shape))
+        # A plain ndarray view indexes faster than the memmap subclass
+        tables[name] = array.view(np.ndarray)
+    return tables
+
+# Tables mapped from `path`, building and saving them first if the file is
+# missing or stale
+def shared_tables(path):
+    try:
+        return load_tables(path)
+    except (FileNotFoundError, ValueError):
+        save_tables(build_tables(), path)
+        return load_tables(path)
+
+# The tables poker.batch uses: shared from the POKER_TABLES file if it is set
+def evaluator_tables():
+    path = os.environ.get(TABLES_ENV)
+    if path:
+        return shared_tables(path)
+    return build_tables()
+
+# Resident and anonymous (heap) memory of this process in kB, from
+# /proc/self/smaps_rollup; None where that isn't available
+def memory_kb():
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f.read().splitlines()[1:])
+    except OSError:
+        return None
+    return {name: int(fields[name].split()[0]) for name in ('Rss', 'Pss', 'Anonymous')}
+
+# Memory a worker adds by getting the tables one way or the other and
+# touching every page
+def _worker_memory(args):
+    path, shared = args
+    before = memory_kb()
+    tables = shared_tables(path) if shared else build_tables()
+    for array in tables.values():
+        int(array.sum())
+    after = memory_kb()
+    if before is None:
+        return None
+    return {name: after[name] - before[name] for name in after}
+
+def report(path, workers=4):
+    start = time.perf_counter()
+    tables = build_tables()
+    build_seconds = time.perf_counter() - start
+    save_tables(tables, path)
+    start = time.perf_counter()
+    load_tables(path)
+    load_seconds = time.perf_counter() - start
+    print('Built %d tables (%d kB) in %.1f ms, saved to %s (%d kB)' % (
+        len(tables), sum(array.nbytes for array in tables.values()) // 1024, build_seconds * 1000, path,
+        os.path.getsize(path) // 1024))
+    print('Mapped them in %.2f ms' % (load_seconds * 1000))
+
+    from concurrent.futures import ProcessPoolExecutor
+    for shared in (False, True):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            usage = list(executor.map(_worker_memory, [(path, shared)] * workers))
+        if usage[0] is None:
+            print('Per-worker memory is not available on this platform')
+            return
+        print('%s, per worker: %s' % ('Shared file' if shared else 'Built in memory', ', '.join(
+            '%s +%d kB' % (name, sum(u[name] for u in usage) / workers) for name in usage[0])))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m poker.tables', description='Build the shared evaluator tables')
+    parser.add_argument('path', nargs='?', default='evaluator_tables.bin')
+    parser.add_argument('--workers', type=int, default=4, help='processes for the memory report')
+    args = parser.parse_args(argv)
+    report(args.path, args.workers)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import numpy as np
+
+from poker.outcomes import OutcomeLog, record_count
+from poker.reports import what_wins_table
+
+# A player count interrupted mid-run is simulated again from the start, so
+# its log must not keep the interrupted run's chunks
+def test_resumed_what_wins_logs_each_deal_once(tmp_path):
+    record_dir = str(tmp_path / 'outcomes')
+    partial = OutcomeLog(str(tmp_path / 'outcomes' / 'players_3'), 3, chunk_records=100)
+    partial.append(np.zeros((250, 3, 2), np.uint8), np.zeros((250, 5), np.uint8), np.zeros((250, 3), np.int64),
+                   np.zeros(250, np.uint8))
+    partial.close()
+
+    what_wins_table(sims=1000, checkpoint_dir=str(tmp_path / 'checkpoints'), player_counts=[2, 3],
+                    record_dir=record_dir)
+    assert record_count(str(tmp_path / 'outcomes' / 'players_2')) == 1000
+    assert record_count(str(tmp_path / 'outcomes' / 'players_3')) == 1000
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from poker import ranges
+from poker.dealing import Dealer
+from poker.evaluator import encode, parse_cards
+from poker.ranges import COMBO_CARDS, Range, combo_number, deal_ranged
+from poker.simulation import holdem_simulation
+
+HERO = encode(parse_cards('Ks2c'))
+ACES = Range.parse('AA')
+
+def aces_share(hands):
+    return ((hands[..., 0] >> 2) == 12).mean(axis=0)
+
+@pytest.fixture(params=['table', 'rejection', 'gibbs'])
+def joint_path(request, monkeypatch):
+    if request.param != 'table':
+        monkeypatch.setattr(ranges, 'JOINT_TABLE_LIMIT', 0)
+    if request.param == 'gibbs':
+        monkeypatch.setattr(ranges, 'JOINT_REJECTION_ROUNDS', 0)
+    ranges._joint_table.cache_clear()
+    yield request.param
+    ranges._joint_table.cache_clear()
+
+# Two seats with the same range hold AA equally often: 2/3 of the time for
+# 'KK AA:3' with Ks out, where KK can't appear twice
+def test_same_range_same_frequency_per_seat(joint_path):
+    kings_aces = Range.parse('KK AA:3')
+    hands, board = deal_ranged(HERO, [kings_aces, kings_aces], 200000, 5, np.random.default_rng(0))
+    assert aces_share(hands) == pytest.approx([2 / 3, 2 / 3], abs=0.005)
+
+# Swapping the seats of two different ranges swaps their frequencies
+def test_swapped_seats_swap_frequencies(joint_path):
+    tight = Range.parse('KK AA:3')
+    wide = Range.parse('AA AKs KK')
+    first, board = deal_ranged(HERO, [tight, wide], 200000, 5, np.random.default_rng(1))
+    second, board = deal_ranged(HERO, [wide, tight], 200000, 5, np.random.default_rng(2))
+    assert aces_share(first) == pytest.approx(aces_share(second)[::-1], abs=0.005)
+
+def test_ranged_hands_never_collide(joint_path):
+    hands, board = deal_ranged(HERO, [ACES, None, ACES], 20000, 5, np.random.default_rng(3))
+    cards = np.concatenate([np.broadcast_to(HERO, (len(hands), 2)), hands.reshape(len(hands), -1), board], axis=1)
+    assert all(len(set(row)) == len(row) for row in cards.tolist())
+
+# Five seats of a tight range use 10 of the 12 queens, kings and aces;
+# whole-tuple rejection almost never succeeds, but every deal must
+def test_tight_range_at_five_seats():
+    tight = Range.parse('QQ+ AK')
+    hands, board = deal_ranged(HERO, [tight] * 5, 5000, 5, np.random.default_rng(5))
+    cards = np.concatenate([np.broadcast_to(HERO, (len(hands), 2)), hands.reshape(len(hands), -1), board], axis=1)
+    assert all(len(set(row)) == len(row) for row in cards.tolist())
+    # Every seat holds AA 6/35 of the time, by enumerating the 37,800 tuples
+    aces = (hands >> 2 == 12).all(axis=2).mean(axis=0)
+    assert aces == pytest.approx(np.full(5, 6 / 35), abs=0.02)
+
+def test_impossible_ranges_raise():
+    with pytest.raises(ValueError):
+        deal_ranged(HERO, [Range.parse('AsAh'), Range.parse('AsAd')], 10, 5, np.random.default_rng(0))
+
+def test_single_deals_are_joint_too():
+    kings_aces = Range.parse('KK AA:3')
+    dealer = Dealer(HERO, rng=np.random.default_rng(4))
+    counts = np.zeros(2)
+    for i in range(20000):
+        dealer.kill(HERO)
+        combos = ranges.sample_joint(dealer.dead_mask, [kings_aces, kings_aces], 1, dealer.rng)[0]
+        counts += (COMBO_CARDS[combos][:, 0] >> 2) == 12
+    assert counts / 20000 == pytest.approx([2 / 3, 2 / 3], abs=0.015)
+    assert holdem_simulation(parse_cards('Ks2c'), 2, dealer=dealer, ranges=kings_aces) in ('Win', 'Tie', 'Loss')
+
+# A caller's Dealer can be reused for another hero afterwards
+@pytest.mark.parametrize('opponent_ranges', [None, Range.parse('KK AA:3')])
+def test_holdem_simulation_leaves_the_dealer_alone(opponent_ranges):
+    dealer = Dealer(rng=np.random.default_rng(6))
+    for i in range(200):
+        holdem_simulation(parse_cards('Ks2c'), 3, dealer=dealer, ranges=opponent_ranges)
+    assert dealer.dead_mask == 0 and len(dealer.live) == 52
@@ -0,0 +1,24 @@
+import numpy as np
+
+from poker.results import ResultsWriter
+
+COLUMNS = [('Class', object), ('Suited', bool), ('Count', np.int64), ('Win Pct', float)]
+
+ROWS = [{'Class': 'AKs', 'Suited': True, 'Count': 4, 'Win Pct': 67.0},
+        {'Class': 'AKo', 'Suited': False, 'Count': 12, 'Win Pct': 65.4}]
+
+def test_resume_round_trip(tmp_path):
+    path = str(tmp_path / 'checkpoint.csv')
+    writer = ResultsWriter(path, COLUMNS, 'Class', 4)
+    for row in ROWS:
+        writer.append(row)
+    writer.close()
+
+    resumed = ResultsWriter(path, COLUMNS, 'Class', 4)
+    resumed.close()
+    columns = resumed.columns()
+    assert 'AKs' in resumed and 'AKo' in resumed
+    assert columns['Suited'].tolist() == [True, False]
+    assert columns['Count'].tolist() == [4, 12]
+    assert columns['Win Pct'].tolist() == [67.0, 65.4]
+    assert columns['Class'].tolist() == ['AKs', 'AKo']
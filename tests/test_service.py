@@ -0,0 +1,22 @@
+import pytest
+
+from poker.service import canonical_query
+
+# Malformed bodies are rejected with a message before reaching a worker
+@pytest.mark.parametrize('kind, query, message', [
+    ('equity', [1, 2], 'JSON object'),
+    ('equity', {'hand': 'AsKh', 'rang': 'QQ+'}, 'unknown equity fields: rang'),
+    ('what-wins', {'players': 6, 'hand': 'AsKh'}, 'unknown what-wins fields: hand'),
+    ('equity', {'hand': 'AsKh', 'opponents': 30}, 'at most 22 opponents'),
+    ('equity', {'hand': 'AsKh', 'opponents': [{'rnge': 'QQ+'}]}, 'ranged opponent'),
+    ('equity', {'hand': 'AsKh', 'opponents': '3'}, 'number or a list'),
+    ('equity', {'hand': 5}, 'must be a string'),
+])
+def test_bad_queries_raise_value_error(kind, query, message):
+    with pytest.raises(ValueError, match=message):
+        canonical_query(kind, query)
+
+def test_suit_relabelled_spots_share_a_key():
+    first, _ = canonical_query('equity', {'hand': 'AsKh', 'board': 'Qs Js 2d', 'opponents': 2})
+    second, _ = canonical_query('equity', {'hand': 'AhKs', 'board': 'Qh Jh 2d', 'opponents': 2})
+    assert first == second
@@ -0,0 +1,23 @@
+import pytest
+
+from poker.evaluator import describe, parse_cards
+from poker.showdown import break_tie, game_result, hand_key, winning_result
+
+BOARD = parse_cards('Ks Kh Kd 7c 2s')
+
+# Full houses with the same trips are decided by the pair, down to a split
+@pytest.mark.parametrize('hand, other, result', [
+    ('7s 3h', '2h 3d', 'Win'),
+    ('2h 3d', '7s 3h', 'Loss'),
+    ('7h 3h', '7d 4d', 'Tie'),
+])
+def test_full_houses_with_equal_trips(hand, other, result):
+    assert game_result(parse_cards(hand), [parse_cards(other)], BOARD) == result
+
+def test_hand_key_orders_and_describes_hands():
+    sevens_full = hand_key(parse_cards('7s 3h') + BOARD)
+    deuces_full = hand_key(parse_cards('2h 3d') + BOARD)
+    assert sevens_full > deuces_full
+    assert describe(sevens_full) == ('full house', (13, 7))
+    assert break_tie(parse_cards('7s 3h') + BOARD, parse_cards('2h 3d') + BOARD) == 1
+    assert winning_result([parse_cards('7s 3h'), parse_cards('Kc 3d')], BOARD) == 'four of a kind'
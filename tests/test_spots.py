@@ -0,0 +1,13 @@
+import numpy as np
+import pytest
+
+from poker.evaluator import parse_cards
+from poker.ranges import Range
+from poker.spots import Spot
+
+# A range the known cards rule out entirely fails the same way on both paths
+@pytest.mark.parametrize('exact_threshold', [10 ** 9, 0])
+def test_range_blocked_by_dead_cards(exact_threshold):
+    spot = Spot(parse_cards('AsKh'), None, [Range.parse('AsKh')])
+    with pytest.raises(ValueError, match='collides'):
+        spot.equity(sims=100, exact_threshold=exact_threshold, rng=np.random.default_rng(0))